@@ -24,6 +24,10 @@
 
 import machine
 import gc
+# Optionally allocate the frame buffer and other long lived buffers from one
+# block reserved before anything else. Call report() once the GUI is built.
+# from gui.core.arena import reserve
+# reserve(16_000)  # Bytes
 
 # *** Choose your color display driver here ***
 # Driver supporting non-STM platforms
@@ -0,0 +1,264 @@
+# banded.py Rendering in horizontal bands for displays too large to buffer
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# A full RGB565 frame buffer for a 240*320 display needs 150KB. A banded driver
+# instead records each drawing operation. .show() replays the operations once
+# for each horizontal band of the display into a strip buffer of a few lines,
+# sending each band to the display's address window. RAM use is that of the
+# strip plus the list of operations: CPU time is traded for RAM. The strip
+# height is a constructor arg: fewer lines use less RAM but replay the list
+# more often.
+# An operation is discarded when a later opaque rectangle (e.g. the one which
+# blanks a widget before it is redrawn, a glyph or a blit of known size)
+# entirely covers it, or when the same shape is drawn again, e.g. in the
+# background color to erase it. fill() discards them all. The list therefore
+# stays in proportion to the content of the screen.
+# Limitations: the display cannot be read back (.readable is False): pixel()
+# returns 0, scroll() and blitting from the device (fplot's cache option) raise
+# ValueError and a Writer clips rather than scrolls. Writer and CWriter render
+# text by .glyph() using the palette arg of blit(), which requires recent
+# firmware.
+# Usage (driver code):
+# class MyDisplay(Banded, MyDriver):  # MyDriver provides .block()
+#     def __init__(self, ...):
+#         ... configure the hardware, set .width and .height
+#         self._banded(lines)  # Allocate the strip
+#         super(MyDriver, self).__init__(self.buffer, self.width, self.lines, self.mode)
+
+import framebuf
+import gc
+try:
+    from gui.core.arena import buffer
+except ImportError:  # Driver used without the GUI
+    def buffer(n, name=None):
+        return bytearray(n)
+
+# Bytes needed by a FrameBuffer of a given size and mode.
+def _bufsize(width, height, mode):
+    if mode == framebuf.MONO_VLSB:
+        return width * ((height + 7) // 8)
+    if mode == framebuf.RGB565:
+        return width * height * 2
+    if mode == framebuf.GS8:
+        return width * height
+    if mode == framebuf.GS4_HMSB:
+        return ((width + 1) // 2) * height
+    if mode == framebuf.GS2_HMSB:
+        return ((width + 3) // 4) * height
+    return ((width + 7) // 8) * height  # MONO_HLSB, MONO_HMSB
+
+# Replay functions. Each operation is a tuple (x0, y0, x1, y1, func, args...)
+# holding its inclusive bounding box. func is called with the strip, the row
+# at the top of the band and the operation.
+def _fill_rect(fb, y, op):
+    fb.fill_rect(op[0], op[1] - y, op[2] - op[0] + 1, op[3] - op[1] + 1, op[5])
+
+def _rect(fb, y, op):
+    fb.rect(op[0], op[1] - y, op[2] - op[0] + 1, op[3] - op[1] + 1, op[5])
+
+def _pixel(fb, y, op):
+    fb.pixel(op[0], op[1] - y, op[5])
+
+def _line(fb, y, op):
+    fb.line(op[5], op[6] - y, op[7], op[8] - y, op[9])
+
+def _text(fb, y, op):
+    fb.text(op[5], op[0], op[1] - y, op[6])
+
+# A blit replays a copy of its source: see Banded.blit.
+def _blit(fb, y, op):
+    if op[7] is None:
+        fb.blit(op[5], op[0], op[1] - y, op[6])
+    else:
+        fb.blit(op[5], op[0], op[1] - y, op[6], op[7])
+
+def _ellipse(fb, y, op):
+    fb.ellipse(op[5], op[6] - y, op[7], op[8], op[11], op[9], op[10])
+
+def _poly(fb, y, op):
+    fb.poly(op[5], op[6] - y, op[7], op[9], op[8])
+
+# A function drawing directly into the strip: see Banded.record.
+def _call(fb, y, op):
+    d = op[7]
+    op[5](d.buffer, d.mode, d.width, d.lines, y, *op[6])
+
+# A 1 bit glyph: pixels are mapped to background and foreground colors by a
+# 2 pixel palette.
+_pal = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)
+
+def _glyph(fb, y, op):
+    _pal.pixel(0, 0, op[7])
+    _pal.pixel(1, 0, op[6])
+    fb.blit(op[5], op[0], op[1] - y, -1, _pal)
+
+# Mixin for a FrameBuffer based driver with a .block(x0, y0, x1, y1, buf)
+# method writing a buffer to an address window.
+class Banded():
+    readable = False  # Pixels are not stored: see above
+
+    # Byte swapped RGB565: framebuf stores pixels little endian.
+    @staticmethod
+    def rgb(r, g, b):
+        return (r & 0xf8) | (g >> 5) | ((g & 0x1c) << 11) | ((b & 0xf8) << 5)
+
+    def _banded(self, lines):
+        self.lines = min(lines, self.height)
+        self.mode = framebuf.RGB565
+        gc.collect()
+        self.buffer = buffer(self.width * self.lines * 2, 'band')
+        # The instance's own drawing methods record: replay uses a plain
+        # FrameBuffer on the strip.
+        self._strip = framebuf.FrameBuffer(self.buffer, self.width, self.lines, self.mode)
+        n = self.height % self.lines  # Rows in a short last band
+        self._last = memoryview(self.buffer)[: self.width * n * 2] if n else None
+        self._ops = []
+
+    # No. of recorded operations: each costs about 50 bytes.
+    def ops(self):
+        return len(self._ops)
+
+    # Add an operation. cover: it is an opaque rectangle. solid: its pixels do
+    # not depend on its color, which is the last element.
+    def _add(self, op, cover=False, solid=True):
+        ops = self._ops
+        x0, y0, x1, y1 = op[0], op[1], op[2], op[3]
+        if cover:  # Discard operations hidden by an opaque rectangle
+            i = 0
+            while i < len(ops):
+                o = ops[i]
+                if o[0] >= x0 and o[1] >= y0 and o[2] <= x1 and o[3] <= y1:
+                    del ops[i]
+                else:
+                    i += 1
+        elif solid:  # Drawn again, perhaps in another color (e.g. erased)
+            for i in range(len(ops)):
+                o = ops[i]
+                if o[0] == x0 and o[1] == y0 and o[2] == x1 and o[3] == y1 and o[:-1] == op[:-1]:
+                    del ops[i]
+                    break
+        elif op in ops:  # Drawn again: the earlier copy is overwritten
+            ops.remove(op)
+        ops.append(op)
+
+    def fill(self, c):
+        self._ops.clear()
+        if c:
+            self._ops.append((0, 0, self.width - 1, self.height - 1, _fill_rect, c))
+
+    def fill_rect(self, x, y, w, h, c):
+        if w > 0 and h > 0:
+            self._add((x, y, x + w - 1, y + h - 1, _fill_rect, c), True)
+
+    def hline(self, x, y, w, c):
+        if w > 0:
+            self._add((x, y, x + w - 1, y, _fill_rect, c))
+
+    def vline(self, x, y, h, c):
+        if h > 0:
+            self._add((x, y, x, y + h - 1, _fill_rect, c))
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+        elif w > 0 and h > 0:
+            self._add((x, y, x + w - 1, y + h - 1, _rect, c))
+
+    def pixel(self, x, y, c=None):
+        if c is None:
+            return 0  # The display cannot be read
+        self._add((x, y, x, y, _pixel, c))
+
+    def line(self, x0, y0, x1, y1, c):
+        self._add((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1), _line, x0, y0, x1, y1, c))
+
+    def text(self, s, x, y, c=1):
+        self._add((x, y, x + 8 * len(s) - 1, y + 7, _text, s, c))
+
+    # The source is copied: it may be redrawn (e.g. an Offscreen) before the
+    # next show(). It must declare its width, height and mode, as Offscreen and
+    # nanogui.Window do. A blit with no key color covers what it overlays. The
+    # copy made by an identical earlier blit, which this one replaces, is
+    # reused.
+    def blit(self, fb, x, y, key=-1, palette=None):
+        if fb is self:
+            raise ValueError('A banded display cannot be read: it cannot be a blit source.')
+        try:
+            dims = (fb.width, fb.height, fb.mode)
+        except AttributeError:
+            raise ValueError('Blit source must have width, height and mode, e.g. an Offscreen.')
+        x1 = min(x + dims[0], self.width) - 1
+        y1 = min(y + dims[1], self.height) - 1
+        if x1 < x or y1 < y:
+            return
+        copy = None
+        for op in self._ops:
+            if op[4] is _blit and op[0] == x and op[1] == y and op[2] == x1 and op[3] == y1 \
+                    and op[6] == key and op[7] is palette and op[8] == dims:
+                copy = op[5]
+                break
+        if copy is None:
+            copy = framebuf.FrameBuffer(bytearray(_bufsize(*dims)), *dims)
+        copy.blit(fb, 0, 0)
+        self._add((x, y, x1, y1, _blit, copy, key, palette, dims), key == -1, False)
+
+    # Render a 1 bit glyph in the given colors. Called by Writer and CWriter,
+    # whose per-font pool keeps fb valid and unchanged.
+    def glyph(self, fb, x, y, w, h, fgcolor, bgcolor):
+        self._add((x, y, x + w - 1, y + h - 1, _glyph, fb, fgcolor, bgcolor), True)
+
+    # Record a function which draws directly into the strip, e.g. the image
+    # decoder. It is replayed as func(buffer, mode, width, lines, y, *args)
+    # where y is the row at the top of the band, and is bounded by x0, y0, x1,
+    # y1 (inclusive). opaque: it covers every pixel of its bounding box.
+    def record(self, func, x0, y0, x1, y1, args, opaque=False):
+        self._add((x0, y0, x1, y1, _call, func, args, self), opaque, False)
+
+    def ellipse(self, x, y, xr, yr, c, f=False, m=15):
+        self._add((x - xr, y - yr, x + xr, y + yr, _ellipse, x, y, xr, yr, f, m, c))
+
+    def poly(self, x, y, coords, c, f=False):
+        x0 = x1 = coords[0]
+        y0 = y1 = coords[1]
+        for i in range(2, len(coords), 2):
+            x0 = min(x0, coords[i])
+            x1 = max(x1, coords[i])
+            y0 = min(y0, coords[i + 1])
+            y1 = max(y1, coords[i + 1])
+        self._add((x + x0, y + y0, x + x1, y + y1, _poly, x, y, coords, f, c))
+
+    def scroll(self, dx, dy):
+        raise ValueError('A banded display cannot scroll: it holds operations, not pixels.')
+
+    # Render the band starting at row y into the strip. Return the no. of rows.
+    def _render(self, y):
+        n = min(self.lines, self.height - y)
+        y1 = y + n - 1
+        fb = self._strip
+        fb.fill(0)
+        for op in self._ops:
+            if op[1] <= y1 and op[3] >= y:
+                op[4](fb, y, op)
+        return n
+
+    def show(self):
+        y = 0
+        while y < self.height:
+            n = self._render(y)
+            self.block(0, y, self.width - 1, y + n - 1, self.buffer if n == self.lines else self._last)
+            y += n
+
+    # Generator: as show() but yield after each of split segments, with CS
+    # deasserted so the bus may be used by other devices.
+    def show_iter(self, split=4):
+        seg = -(-self.height // split)  # Rows per segment
+        y = 0
+        while y < self.height:
+            ys = min(y + seg, self.height)
+            while y < ys:
+                n = self._render(y)
+                self.block(0, y, self.width - 1, y + n - 1, self.buffer if n == self.lines else self._last)
+                y += n
+            yield
@@ -0,0 +1,154 @@
+# bus.py Allocation free SPI access for display drivers
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# A refresh should not allocate: each allocation brings the next GC closer and
+# a GC in mid frame stalls the transfer. SPIDev holds preallocated buffers for
+# commands and their arguments. Data is written directly from the caller's
+# buffer (a bytearray or memoryview) without copying.
+# CS is active low. DC is 0 for a command, 1 for data.
+# Sharing a bus: each SPI peripheral has an SPIBus which records the device
+# that last configured it. A device with a baudrate initialises the bus only if
+# another device has used it since, rather than on every transfer. Devices on
+# the same bus share its SPIBus: get_bus() returns it for a machine.SPI
+# instance. Code driving the bus directly (e.g. an SD card driver) should hold
+# the lock and call .release() so that the next display transfer reconfigures
+# it.
+# Usage (driver code):
+# from drivers.bus import SPIDev
+# self._bus = SPIDev(spi, pincs, pindc, 11_000_000, 1, 1)
+# self._bus.cmd_hh(0x2a, 0, self.width - 1)  # Command with two 16 bit args
+# self._bus.begin(0x2c)  # Start of a data stream
+# self._bus.spi.write(linebuf)  # ... as often as required
+# self._bus.end()
+# Usage (application sharing the bus with an SD card):
+# bus = get_bus(spi)
+# async with bus.lock:
+#     sd.readblocks(n, buf)
+#     bus.release()
+
+import gc
+
+class SPIBus():
+    def __init__(self, spi):
+        self.spi = spi
+        self.owner = None  # Device which last configured the bus
+        self._lock = None
+
+    # An asyncio lock arbitrating between tasks using the bus. uasyncio is only
+    # imported if the lock is used.
+    @property
+    def lock(self):
+        if self._lock is None:
+            import uasyncio as asyncio
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    # The bus has been used outside of this module: the next device to use it
+    # must reconfigure it.
+    def release(self):
+        self.owner = None
+
+_buses = []
+
+# Return the SPIBus for a machine.SPI instance (or an SPIBus), creating it if
+# necessary.
+def get_bus(spi):
+    if isinstance(spi, SPIBus):
+        return spi
+    for bus in _buses:
+        if bus.spi is spi:
+            return bus
+    bus = SPIBus(spi)
+    _buses.append(bus)
+    return bus
+
+class SPIDev():
+    # spi may be a machine.SPI instance or an SPIBus.
+    def __init__(self, spi, cs, dc, baudrate=None, polarity=0, phase=0):
+        self.bus = get_bus(spi)
+        self.spi = self.bus.spi
+        self._cs = cs
+        self._dc = dc
+        self.rate = baudrate
+        self.polarity = polarity
+        self.phase = phase
+        self._b1 = bytearray(1)  # Command
+        self._b4 = bytearray(4)  # Arguments
+
+    # Take ownership of the bus, configuring it if another device used it last.
+    def claim(self):
+        bus = self.bus
+        if bus.owner is not self:
+            bus.owner = self
+            if self.rate is not None:
+                self.spi.init(baudrate=self.rate, polarity=self.polarity, phase=self.phase)
+
+    # Write a buffer as a command (dc == 0) or data (dc == 1).
+    def write(self, buf, dc):
+        self.claim()
+        self._cs(1)
+        self._dc(dc)
+        self._cs(0)
+        self.spi.write(buf)
+        self._cs(1)
+
+    # Write a single byte command.
+    def cmd(self, c):
+        self._b1[0] = c
+        self.write(self._b1, 0)
+
+    # Write a command with two 16 bit big endian args, e.g. an address window.
+    def cmd_hh(self, c, a, b):
+        self.cmd(c)
+        b4 = self._b4
+        b4[0] = a >> 8
+        b4[1] = a & 0xff
+        b4[2] = b >> 8
+        b4[3] = b & 0xff
+        self.write(b4, 1)
+
+    # Write a command with a sequence of byte args, sent one at a time from the
+    # preallocated buffer in a single CS cycle.
+    def cmd_args(self, c, args):
+        self.begin(c)
+        b1 = self._b1
+        for a in args:
+            b1[0] = a
+            self.spi.write(b1)
+        self.end()
+
+    # Write a command and leave CS asserted with DC set for data. The caller
+    # writes the data with .spi.write() and terminates the stream with .end().
+    def begin(self, c):
+        self.claim()
+        self._b1[0] = c
+        self._cs(1)
+        self._dc(0)
+        self._cs(0)
+        self.spi.write(self._b1)
+        self._dc(1)
+
+    def end(self):
+        self._cs(1)
+
+# Debug aid: return the no. of bytes allocated by a call with up to two args. GC
+# is disabled for the duration. A driver's .show() (or nanogui.refresh() with
+# nothing to draw) should return 0.
+# from drivers.bus import allocated
+# print(allocated(refresh, ssd))
+def allocated(func, a=None, b=None):
+    gc.collect()
+    gc.disable()
+    try:
+        m = gc.mem_alloc()
+        if a is None:
+            func()
+        elif b is None:
+            func(a)
+        else:
+            func(a, b)
+        return gc.mem_alloc() - m
+    finally:
+        gc.enable()
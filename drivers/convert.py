@@ -0,0 +1,99 @@
+# convert.py Table driven conversion of frame buffer lines for color drivers
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# Drivers whose frame buffer format differs from that of the display convert
+# each line as it is sent. A table holds the output value for every possible
+# source pixel as a big endian 16 bit word: 512 bytes for 8 bit pixels, 32
+# bytes for 4 bit. The kernels below expand a line by table lookup, so any
+# source and destination format runs at the same speed and no driver needs its
+# own bit manipulation code. Kernels producing 12 bit color pack pixel pairs
+# into 3 bytes: the table then holds 12 bit values.
+# The source may be a buffer or its address as an int. Passing
+# addressof(buf) + start rather than buf[start :] avoids allocating a
+# memoryview for every line sent.
+# Usage (driver code):
+# from drivers.convert import table, lut8, bgr565
+# self._lut = table(bgr565)
+# lut8(linebuf, addressof(buf) + start, self._lut, self.width)
+
+import micropython
+
+# Pixel functions: convert an 8 bit rrrgggbb value to an output word.
+# RGB565 as used by most displays.
+def rgb565(c):
+    return ((c & 0xe0) << 8) | ((c & 0x1c) << 6) | ((c & 3) << 3)
+
+# BGR565: displays with the color sequence reversed (e.g. SSD1351).
+def bgr565(c):
+    return ((c & 3) << 14) | ((c & 0x1c) << 6) | ((c & 0xe0) >> 3)
+
+# RGB444 (12 bit).
+def rgb444(c):
+    return ((c & 0xe0) << 4) | ((c & 0x1c) << 3) | ((c & 3) << 2)
+
+# Build a table from a pixel function for pixels of a given no. of bits.
+def table(func, bits=8):
+    lut = bytearray(2 << bits)
+    for c in range(1 << bits):
+        w = func(c)
+        lut[c * 2] = w >> 8
+        lut[c * 2 + 1] = w & 0xff
+    return lut
+
+# Kernels. length is the number of source bytes.
+# Plain copy: sends part of a buffer from a preallocated line buffer.
+@micropython.viper
+def copy(dest:ptr8, source:ptr8, length:int):
+    for x in range(length):
+        dest[x] = source[x]
+
+# 4 bit pixels (GS4_HMSB: leftmost pixel in the high nibble) to 16 bits.
+@micropython.viper
+def lut4(dest:ptr8, source:ptr8, lut:ptr8, length:int):
+    n = 0
+    for x in range(length):
+        c = source[x]
+        d = (c >> 4) << 1
+        e = (c & 0x0f) << 1
+        dest[n] = lut[d]
+        dest[n + 1] = lut[d + 1]
+        dest[n + 2] = lut[e]
+        dest[n + 3] = lut[e + 1]
+        n += 4
+
+# 8 bit pixels to 16 bits.
+@micropython.viper
+def lut8(dest:ptr8, source:ptr8, lut:ptr8, length:int):
+    n = 0
+    for x in range(length):
+        c = source[x] << 1
+        dest[n] = lut[c]
+        dest[n + 1] = lut[c + 1]
+        n += 2
+
+# 4 bit pixels to 12 bits. 1 byte becomes 3.
+@micropython.viper
+def lut4_12(dest:ptr8, source:ptr8, lut:ptr8, length:int):
+    n = 0
+    for x in range(length):
+        c = source[x]
+        d = (c >> 4) << 1
+        e = (c & 0x0f) << 1
+        dest[n] = (lut[d] << 4) | (lut[d + 1] >> 4)
+        dest[n + 1] = ((lut[d + 1] << 4) & 0xff) | lut[e]
+        dest[n + 2] = lut[e + 1]
+        n += 3
+
+# 8 bit pixels to 12 bits. 2 bytes become 3: length must be even.
+@micropython.viper
+def lut8_12(dest:ptr8, source:ptr8, lut:ptr8, length:int):
+    n = 0
+    for x in range(0, length, 2):
+        c = source[x] << 1
+        d = source[x + 1] << 1
+        dest[n] = (lut[c] << 4) | (lut[c + 1] >> 4)
+        dest[n + 1] = ((lut[c + 1] << 4) & 0xff) | lut[d]
+        dest[n + 2] = lut[d + 1]
+        n += 3
@@ -0,0 +1,16 @@
+# double.py Double buffering for color drivers
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# A driver constructed with double=True allocates a second buffer, ._back.
+# snapshot() copies the frame buffer to it and the next .show() transmits the
+# copy, so the application may draw while the transfer is in progress (see
+# gui.core.threaded). Drivers bind it as a method:
+# from drivers.double import snapshot
+# class MyDriver(framebuf.FrameBuffer):
+#     snapshot = snapshot
+
+def snapshot(drv):
+    drv._back[:] = drv.buffer
+    drv._snap = True
@@ -2,10 +2,18 @@
 from time import sleep
 from math import cos, sin, pi, radians
 from sys import implementation
-import ustruct
 import utime
 import gc
 import framebuf
+from uctypes import addressof
+from drivers.palette import Palette
+from drivers.bus import SPIDev
+try:
+    from gui.core.arena import buffer
+except ImportError:  # Driver used without the GUI
+    def buffer(n, name=None):
+        return bytearray(n)
+from drivers.double import snapshot
 
 def color565(r, g, b):
     """Return RGB565 color value.
@@ -18,27 +26,7 @@ def color565(r, g, b):
 
 
 def create_lut():
-    lut = bytearray(32)
-    clup = [(0, 0, 0), # 0 - Black
-            (127, 0, 0), # 1 - red
-            (0, 127, 0), # 2 - green
-            (0, 0, 127), # 3 - blue
-            (127, 127, 0), # 4 - yellow
-            (127, 0, 127), # 5 - magenta
-            (0, 127, 127), # 6 - cyan
-            (80, 80, 80), # 7 - grey
-            (160, 160, 160), # 8 - Grey
-            (255, 0, 0), # 9 - Red
-            (0, 255, 0), # 10 - Green
-            (0, 0, 255), # 11 - Blue
-            (255, 255, 0), # 12 - Yellow
-            (255, 0, 255), # 13 - Magenta
-            (0, 255, 255), # 14 - Cyan
-            (255, 255, 255)] # 15 - White
-    for i, color in enumerate(clup):
-        lut[i*2] = color565(*color) >> 8
-        lut[i*2+1] = color565(*color) & 0xff
-    return lut
+    return Palette(4).lut  # Standard 16 colors
 
 class ili9341(framebuf.FrameBuffer):
     """Serial interface for 16-bit color (5-6-5 RGB) IL9341 display.
@@ -105,44 +93,97 @@ class ili9341(framebuf.FrameBuffer):
 
     ##@timed_function
     def __init__(self, spi, cs, dc, rst,
-                 width=240, height=320, rotation=0):
+                 width=240, height=320, rotation=0, double=False, palette=None,
+                 depth=16, init=True):
         """Initialize OLED.
         Args:
-            spi (Class Spi):  SPI interface for OLED
+            spi (Class Spi):  SPI interface for OLED, or a drivers.bus.SPIBus
             cs (Class Pin):  Chip select pin
             dc (Class Pin):  Data/Command pin
             rst (Class Pin):  Reset pin
             width (Optional int): Screen width (default 240)
             height (Optional int): Screen height (default 320)
             rotation (Optional int): Rotation must be 0 default, 90. 180 or 270
+            double (Optional bool): Allocate a second buffer for snapshot()
+            palette (Optional Palette): 4 or 8 bit color lookup table. Default
+                is a 4 bit palette of the standard colors.
+            depth (Optional int): Bits per pixel sent to the display: 16
+                (default) or 12. 12 bit RGB444 reduces transfer time by 25%.
+                Experimental: COLMOD 0x33 is not a documented ILI9341 pixel
+                format and some panels do not accept it.
+            init (Optional bool): Initialise the display (blocks 400ms). If
+                False the application must run the ainit() coroutine.
+        """
+        self._setup(spi, cs, dc, rst, width, height, rotation, depth)
+        self.palette = Palette(4) if palette is None else palette
+        self.mode = framebuf.GS4_HMSB if self.palette.bits == 4 else framebuf.GS8
+        self.lines = 24
+        gc.collect()
+        self.buffer = buffer(self.height * self.width * self.palette.bits // 8, 'frame')
+        self.double = double  # Transfer a copy of the buffer: see snapshot()
+        self._back = buffer(len(self.buffer), 'back') if double else None
+        self._snap = False
+        super().__init__(self.buffer, self.width, self.height, self.mode)
+        self._linebuf = buffer(self.width*self.lines*depth//8, 'line')
+        # Changes to the palette take effect at .show()
+        if depth == 16:
+            self._clut = self.palette.lut
+            self._copy = self.palette.copy  # Function to copy and map colors
+        else:  # 2 pixels are packed into 3 bytes
+            self._clut = self.palette.table12()
+            self._copy = self.palette.copy12
+        self._start(init)
+
+    def _setup(self, spi, cs, dc, rst, width, height, rotation, depth):
+        """Store and check the hardware configuration. No buffers are allocated.
         """
-        self.spi = spi
         self.cs = cs
         self.dc = dc
         self.rst = rst
+        # Serial write cycle is 100ns min: 10MHz, mode 0. The bus is set to
+        # this whenever another device has used it since this one.
+        self.rate = 10_000_000
+        self._bus = SPIDev(spi, cs, dc, self.rate, 0, 0)  # Preallocated command buffers
+        self.spi = self._bus.spi  # spi may be an SPIBus
         self.width = width
         self.height = height
-        self.mode = framebuf.GS4_HMSB
-        self.lines = 24
-        gc.collect()
-        self.buffer = bytearray(self.height * self.width // 2)
-        self._mvb = memoryview(self.buffer)
-        super().__init__(self.buffer, self.width, self.height, self.mode)
-        self._linebuf = bytearray(self.width*self.lines*2)
-        self._clut = create_lut()
-        
+        if depth not in (12, 16):
+            raise ValueError('Depth must be 12 or 16.')
+        self.depth = depth
         if rotation not in self.ROTATE.keys():
             raise RuntimeError('Rotation must be 0, 90, 180 or 270.')
         else:
             self.rotation = self.ROTATE[rotation]
 
+    def _start(self, init):
+        """Configure the pins and optionally initialise the display.
+        """
         self.cs.init(self.cs.OUT, value=1)
         self.dc.init(self.dc.OUT, value=0)
         self.rst.init(self.rst.OUT, value=1)
-        self.reset()
+        if init:
+            for t in self._init():
+                sleep(t / 1000)
+
+    async def ainit(self):
+        """Initialise the display without blocking the scheduler.
+        No blank frame is sent: the first refresh provides the contents.
+        """
+        import uasyncio as asyncio
+        for t in self._init():
+            await asyncio.sleep_ms(t)
+
+    def _init(self):
+        """Generator: reset and initialise the display.
+        Yields the delay (ms) required before the next step.
+        """
+        self.rst(0)
+        yield 50
+        self.rst(1)
+        yield 50
         # Send initialization commands
         self.write_cmd(self.SWRESET)  # Software reset
-        sleep(.1)
+        yield 100
         self.write_cmd(self.PWCTRB, 0x00, 0xC1, 0x30)  # Pwr ctrl B
         self.write_cmd(self.POSC, 0x64, 0x03, 0x12, 0x81)  # Pwr on seq. ctrl
         self.write_cmd(self.DTCA, 0x85, 0x00, 0x78)  # Driver timing ctrl A
@@ -155,7 +196,7 @@ class ili9341(framebuf.FrameBuffer):
         self.write_cmd(self.VMCTR2, 0x86)  # VCOM ctrl 2
         self.write_cmd(self.MADCTL, self.rotation)  # Memory access ctrl
         self.write_cmd(self.VSCRSADD, 0x00)  # Vertical scrolling start address
-        self.write_cmd(self.PIXFMT, 0x55)  # COLMOD: Pixel format
+        self.write_cmd(self.PIXFMT, 0x55 if self.depth == 16 else 0x33)  # COLMOD: 0x33 is undocumented
         self.write_cmd(self.FRMCTR1, 0x00, 0x18)  # Frame rate ctrl
         self.write_cmd(self.DFUNCTR, 0x08, 0x82, 0x27)
         self.write_cmd(self.ENABLE3G, 0x00)  # Enable 3 gamma ctrl
@@ -165,25 +206,9 @@ class ili9341(framebuf.FrameBuffer):
         self.write_cmd(self.GMCTRN1, 0x00, 0x0E, 0x14, 0x03, 0x11, 0x07, 0x31,
                        0xC1, 0x48, 0x08, 0x0F, 0x0C, 0x31, 0x36, 0x0F)
         self.write_cmd(self.SLPOUT)  # Exit sleep
-        sleep(.1)
+        yield 100
         self.write_cmd(self.DISPLAY_ON)  # Display on
-        sleep(.1)
-
-    @micropython.viper
-    def _lcopy(self, dest:ptr8, source:ptr8, lut:ptr8, length:int):
-        n = 0
-        for x in range(length):
-            c = source[x]
-            d = c >> 4
-            e = c & 0x0f
-            dest[n] = lut[d*2]
-            n += 1
-            dest[n] = lut[d*2+1]
-            n += 1
-            dest[n] = lut[e*2]
-            n += 1
-            dest[n] = lut[e*2+1]
-            n += 1
+        yield 100
 
     ##@timed_function
     def block(self, x0, y0, x1, y1, data):
@@ -195,8 +220,8 @@ class ili9341(framebuf.FrameBuffer):
             y1 (int):  Ending Y position.
             data (bytes): Data buffer to write.
         """
-        self.write_cmd(self.SET_COLUMN, *ustruct.pack(">HH", x0, x1))
-        self.write_cmd(self.SET_PAGE, *ustruct.pack(">HH", y0, y1))
+        self._bus.cmd_hh(self.SET_COLUMN[0], x0, x1)
+        self._bus.cmd_hh(self.SET_PAGE[0], y0, y1)
 
         self.write_cmd(self.WRITE_RAM)
         self.write_data(data)
@@ -213,41 +238,64 @@ class ili9341(framebuf.FrameBuffer):
     def write_cmd(self, command, *args):
         """Write command to display.
         Args:
-            command (byte): ILI9341 command code.
-            *args (optional bytes): Data to transmit.
+            command (bytearray): ILI9341 command code.
+            *args (optional ints): Data bytes to transmit.
+        Args are sent from the bus's preallocated buffer, not a new bytearray.
         """
-        self.dc(0)
-        self.cs(0)
-        self.spi.write(command)
-        self.cs(1)
-        # Handle any passed data
-        if len(args) > 0:
-            self.write_data(bytearray(args))
+        if args:
+            self._bus.cmd_args(command[0], args)
+        else:
+            self._bus.write(command, 0)
 
     def write_data(self, data):
         """Write data to display.
         Args:
             data (bytes): Data to transmit.
         """
-        self.dc(1)
-        self.cs(0)
-        self.spi.write(data)
-        self.cs(1)
+        self._bus.write(data, 1)
+
+    snapshot = snapshot  # Double buffered mode: see drivers/double.py
 
     def show(self):  # Blocks ~200ms on esp32 at stock frequency
         """Write The famebuffer to the display
         """
-        wd = self.width // 2
+        wd = self.width * self.palette.bits // 8  # Bytes per line
         ht = self.height
         lb = self._linebuf
-        buf = self._mvb
-        # Commands needed to start data write 
-        self.write_cmd(self.SET_COLUMN, *ustruct.pack(">HH", 0, self.width))
-        self.write_cmd(self.SET_PAGE, *ustruct.pack(">HH", 0, ht))
-        self.write_cmd(self.WRITE_RAM)
-        self.dc(1)
-        self.cs(0)
-        for start in range(0, wd*ht, wd*self.lines):  # For each line
-            self._lcopy(lb, buf[start :], self._clut, wd*self.lines)  # Copy and map colors (68us)
+        buf = addressof(self._back if self._snap else self.buffer)
+        self._snap = False
+        bus = self._bus  # Commands needed to start data write: no allocation
+        bus.cmd_hh(self.SET_COLUMN[0], 0, self.width)
+        bus.cmd_hh(self.SET_PAGE[0], 0, ht)
+        bus.begin(self.WRITE_RAM[0])
+        start = 0
+        while start < wd*ht:  # For each line. range() with a variable step allocates.
+            self._copy(lb, buf + start, self._clut, wd*self.lines)  # Copy and map colors (68us)
             self.spi.write(lb)
-        self.cs(1)
+            start += wd*self.lines
+        bus.end()
+
+    def show_iter(self, split=4):
+        """Generator: write the framebuffer to the display in segments.
+        Args:
+            split (int): Number of horizontal segments.
+        Yields after each segment with CS deasserted, so the SPI bus may be
+        used by other devices before the next segment is written.
+        """
+        wd = self.width * self.palette.bits // 8  # Bytes per line
+        ht = self.height
+        lb = self._linebuf
+        buf = addressof(self._back if self._snap else self.buffer)
+        self._snap = False
+        seg = -(-ht // split)  # Lines per segment
+        seg += -seg % self.lines  # Whole number of line buffers
+        for y in range(0, ht, seg):
+            y1 = min(y + seg, ht)
+            self._bus.cmd_hh(self.SET_COLUMN[0], 0, self.width)
+            self._bus.cmd_hh(self.SET_PAGE[0], y, ht)
+            self._bus.begin(self.WRITE_RAM[0])
+            for start in range(wd*y, wd*y1, wd*self.lines):
+                self._copy(lb, buf + start, self._clut, wd*self.lines)
+                self.spi.write(lb)
+            self._bus.end()
+            yield
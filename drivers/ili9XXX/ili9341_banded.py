@@ -0,0 +1,37 @@
+"""ILI9341 LCD in full RGB565 color using banded rendering.
+
+Drawing operations are recorded and replayed into a strip of a few lines for
+each band of the display: see drivers/banded.py. With the default 16 lines the
+strip needs 7.5KB against 150KB for a full frame buffer. Text must be rendered
+with CWriter. There is no double buffered mode.
+"""
+from drivers.ili9XXX import ili9341 as base
+from drivers.banded import Banded
+
+class ili9341(Banded, base.ili9341):
+
+    def __init__(self, spi, cs, dc, rst,
+                 width=240, height=320, rotation=0, lines=16, init=True, double=False):
+        """Initialize display.
+        Args:
+            spi (Class Spi):  SPI interface for OLED, or a drivers.bus.SPIBus
+            cs (Class Pin):  Chip select pin
+            dc (Class Pin):  Data/Command pin
+            rst (Class Pin):  Reset pin
+            width (Optional int): Screen width (default 240)
+            height (Optional int): Screen height (default 320)
+            rotation (Optional int): Rotation must be 0 default, 90. 180 or 270
+            lines (Optional int): Rows in each band (default 16). Fewer rows
+                reduce RAM use at the cost of replaying drawing more often.
+            init (Optional bool): Initialise the display (blocks 400ms). If
+                False the application must run the ainit() coroutine.
+            double (Optional bool): Must be False: there is no frame buffer
+                to copy.
+        """
+        if double:
+            raise ValueError('Double buffering is not supported in banded mode.')
+        self.double = False
+        self._setup(spi, cs, dc, rst, width, height, rotation, 16)
+        self._banded(lines)
+        super(base.ili9341, self).__init__(self.buffer, self.width, self.lines, self.mode)
+        self._start(init)
@@ -0,0 +1,104 @@
+# palette.py Color lookup table for drivers with an indexed frame buffer
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# A driver for a 16 bit display may use a 4 or 8 bit frame buffer (GS4_HMSB
+# or GS8) whose pixels index a Palette. Each line is converted to RGB565 (or
+# BGR565 for displays with the color sequence reversed) as it is sent to the
+# display. The driver sets the output format. Palette entries may be changed at runtime: the change
+# takes effect at the next .show() without redrawing any widget. This enables
+# color animation (blinking, fading) at no cost in drawing time.
+# Usage:
+# from drivers.palette import Palette
+# pal = Palette(4)  # 16 colors, initially the standard set
+# ssd = SSD(spi, pcs, pdc, prst, palette=pal)
+# pal[1] = (255, 128, 0)  # Redefine color 1
+
+from drivers.convert import table, rgb565, bgr565, lut4, lut8, lut4_12, lut8_12
+
+# Default colors for 4 bit palettes. These match gui/core/colors_4bit.py.
+COLORS_4BIT = ((0, 0, 0), # 0 - Black
+               (127, 0, 0), # 1 - red
+               (0, 127, 0), # 2 - green
+               (0, 0, 127), # 3 - blue
+               (127, 127, 0), # 4 - yellow
+               (127, 0, 127), # 5 - magenta
+               (0, 127, 127), # 6 - cyan
+               (80, 80, 80), # 7 - grey
+               (160, 160, 160), # 8 - Grey
+               (255, 0, 0), # 9 - Red
+               (0, 255, 0), # 10 - Green
+               (0, 0, 255), # 11 - Blue
+               (255, 255, 0), # 12 - Yellow
+               (255, 0, 255), # 13 - Magenta
+               (0, 255, 255), # 14 - Cyan
+               (255, 255, 255)) # 15 - White
+
+class Palette():
+    # bits: 4 or 8. colors: optional sequence of (r, g, b) tuples. By default a
+    # 4 bit palette has the standard colors and an 8 bit one maps index values
+    # in rrrgggbb format to the corresponding color. fmt: output format,
+    # convert.rgb565 or convert.bgr565.
+    def __init__(self, bits=4, colors=None, fmt=rgb565):
+        if bits not in (4, 8):
+            raise ValueError('Palette must have 4 or 8 bits.')
+        self.bits = bits
+        self._bgr = fmt is bgr565
+        self.copy = lut4 if bits == 4 else lut8  # Line conversion function
+        self.copy12 = lut4_12 if bits == 4 else lut8_12  # For 12 bit output
+        self.lut12 = None  # RGB444 table: see .table12()
+        if colors is None and bits == 8:
+            self.lut = table(fmt)  # RGB565 or BGR565 big endian
+        else:
+            self.lut = bytearray(2 << bits)
+            self.load(COLORS_4BIT if colors is None else colors)
+
+    def __len__(self):
+        return 1 << self.bits
+
+    # Set entry idx to an (r, g, b) tuple, each in range 0-255.
+    def __setitem__(self, idx, rgb):
+        r, g, b = rgb
+        if self._bgr:
+            c = (b & 0xf8) << 8 | (g & 0xfc) << 3 | r >> 3
+        else:
+            c = (r & 0xf8) << 8 | (g & 0xfc) << 3 | b >> 3
+        self.lut[idx * 2] = c >> 8
+        self.lut[idx * 2 + 1] = c & 0xff
+        if self.lut12 is not None:
+            self._set12(idx, r, g, b)
+
+    def _set12(self, idx, r, g, b):
+        self.lut12[idx * 2] = r >> 4
+        self.lut12[idx * 2 + 1] = (g & 0xf0) | (b >> 4)
+
+    # Return the (r, g, b) value of an entry (to the precision of RGB565).
+    def __getitem__(self, idx):
+        c = (self.lut[idx * 2] << 8) | self.lut[idx * 2 + 1]
+        if self._bgr:
+            return (c << 3) & 0xf8, (c >> 3) & 0xfc, (c >> 8) & 0xf8
+        return (c >> 8) & 0xf8, (c >> 3) & 0xfc, (c << 3) & 0xf8
+
+    # Set the output format, convert.rgb565 or convert.bgr565, retaining the
+    # colors. Called by drivers to match the display.
+    def output(self, fmt):
+        bgr = fmt is bgr565
+        if bgr != self._bgr:
+            colors = [self[idx] for idx in range(len(self))]
+            self._bgr = bgr
+            self.load(colors)
+
+    # Return a table of RGB444 values for drivers sending 12 bit color. Once
+    # created it is kept in step with changes to the palette.
+    def table12(self):
+        if self.lut12 is None:
+            self.lut12 = bytearray(len(self.lut))
+            for idx in range(len(self)):
+                self._set12(idx, *self[idx])
+        return self.lut12
+
+    # Set a sequence of entries starting at start.
+    def load(self, colors, start=0):
+        for idx, rgb in enumerate(colors, start):
+            self[idx] = rgb
@@ -17,6 +17,13 @@
 import framebuf
 import machine
 from micropython import const
+from uctypes import addressof
+from drivers.convert import copy
+try:
+    from gui.core.arena import buffer
+except ImportError:  # Driver used without the GUI
+    def buffer(n, name=None):
+        return bytearray(n)
 
 _WRITECMD = const(1)  # Command bits
 _VCOM = const(2)
@@ -30,13 +37,14 @@ class SHARP(framebuf.FrameBuffer):
         self._pincs = pincs
         self.height = height  # Required by Writer class and nanogui
         self.width = width
-        self._buffer = bytearray(self.height * self.width // 8)
+        self._buffer = buffer(self.height * self.width // 8, 'frame')
         self._mvb = memoryview(self._buffer)
         super().__init__(self._buffer, self.width, self.height, framebuf.MONO_HMSB)
         self._cmd = bytearray(1)  # Buffer for command. Holds current VCOM bit
         self._cmd[0] = _WRITECMD | _VCOM if vcom else _WRITECMD
         self._lno = bytearray(1)  # Line no.
         self._dummy = bytearray(1)  # Dummy (0)
+        self._linebuf = buffer(self.width // 8, 'line')  # Slicing _mvb would allocate
 
     # .show should be called periodically to avoid frame inversion flag
     # (VCOM) retaining the same value for long periods
@@ -45,12 +53,14 @@ class SHARP(framebuf.FrameBuffer):
         bpl = self.width // 8  # Bytes per line
         self._pincs(1)  # CS is active high
         spi.write(self._cmd)
-        start = 0
+        start = addressof(self._buffer)
+        lb = self._linebuf
         lno = self._lno
         lno[0] = 1  # Gate line address (starts at 1)
         for _ in range(self.height):
             spi.write(lno)
-            spi.write(self._mvb[start : start + bpl])
+            copy(lb, start, bpl)
+            spi.write(lb)
             spi.write(self._dummy)
             start += bpl
             lno[0] += 1  # Gate line address
@@ -2,6 +2,12 @@
 
 from micropython import const
 import framebuf
+from drivers.bus import SPIDev
+try:
+    from gui.core.arena import buffer
+except ImportError:  # Driver used without the GUI
+    def buffer(n, name=None):
+        return bytearray(n)
 
 
 # register definitions
@@ -31,7 +37,7 @@ class SSD1306(framebuf.FrameBuffer):
         self.height = height
         self.external_vcc = external_vcc
         self.pages = self.height // 8
-        self.buffer = bytearray(self.pages * self.width)
+        self.buffer = buffer(self.pages * self.width, 'frame')
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
@@ -125,10 +131,11 @@ class SSD1306_SPI(SSD1306):
         dc.init(dc.OUT, value=0)
         res.init(res.OUT, value=0)
         cs.init(cs.OUT, value=1)
-        self.spi = spi
         self.dc = dc
         self.res = res
         self.cs = cs
+        self._bus = SPIDev(spi, cs, dc, self.rate)  # Preallocated command buffer
+        self.spi = self._bus.spi  # spi may be an SPIBus
         import time
 
         self.res(1)
@@ -139,17 +146,7 @@ class SSD1306_SPI(SSD1306):
         super().__init__(width, height, external_vcc)
 
     def write_cmd(self, cmd):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
-        self.cs(1)
-        self.dc(0)
-        self.cs(0)
-        self.spi.write(bytearray([cmd]))
-        self.cs(1)
+        self._bus.cmd(cmd)
 
     def write_data(self, buf):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
-        self.cs(1)
-        self.dc(1)
-        self.cs(0)
-        self.spi.write(buf)
-        self.cs(1)
+        self._bus.write(buf, 1)
@@ -49,6 +49,13 @@
 import framebuf
 import utime
 import gc
+from drivers.bus import SPIDev
+try:
+    from gui.core.arena import buffer
+except ImportError:  # Driver used without the GUI
+    def buffer(n, name=None):
+        return bytearray(n)
+from drivers.double import snapshot
 import sys
 # https://github.com/peterhinch/micropython-nano-gui/issues/2
 # The ESP32 does not work reliably in SPI mode 1,1. Waveforms look correct.
@@ -62,18 +69,23 @@ class SSD1331(framebuf.FrameBuffer):
     def rgb(r, g, b):
         return (r & 0xe0) | ((g >> 3) & 0x1c) | (b >> 6)
 
-    def __init__(self, spi, pincs, pindc, pinrs, height=64, width=96):
-        self.spi = spi
+    def __init__(self, spi, pincs, pindc, pinrs, height=64, width=96, double=False):
         self.rate = 6660000  # Data sheet: 150ns min clock period
         self.pincs = pincs
         self.pindc = pindc  # 1 = data 0 = cmd
+        self._bus = SPIDev(spi, pincs, pindc, self.rate, _bs, _bs)
+        self.spi = self._bus.spi  # spi may be an SPIBus
+        self._write = self._bus.write  # (buf, dc) No copy or allocation
         self.height = height  # Required by Writer class
         self.width = width
         # Save color mode for use by writer_gui (blit)
         self.mode = framebuf.GS8  # Use 8bit greyscale for 8 bit color.
         gc.collect()
-        self.buffer = bytearray(self.height * self.width)
+        self.buffer = buffer(self.height * self.width, 'frame')
         super().__init__(self.buffer, self.width, self.height, self.mode)
+        self.double = double  # Transfer a copy of the buffer: see snapshot()
+        self._back = buffer(len(self.buffer), 'back') if double else None
+        self._snap = False
         pinrs(0)  # Pulse the reset line
         utime.sleep_ms(1)
         pinrs(1)
@@ -84,14 +96,9 @@ class SSD1331(framebuf.FrameBuffer):
         gc.collect()
         self.show()
 
-    def _write(self, buf, dc):
-        self.spi.init(baudrate=self.rate, polarity=_bs, phase=_bs)
-        self.pincs(1)
-        self.pindc(dc)
-        self.pincs(0)
-        self.spi.write(buf)
-        self.pincs(1)
+    snapshot = snapshot  # Double buffered mode: see drivers/double.py
 
     def show(self, _cmd=b'\x15\x00\x5f\x75\x00\x3f'):  # Pre-allocate
         self._write(_cmd, 0)
-        self._write(self.buffer, 1)
+        self._write(self._back if self._snap else self.buffer, 1)
+        self._snap = False
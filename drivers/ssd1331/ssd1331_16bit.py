@@ -49,6 +49,15 @@
 import framebuf
 import utime
 import gc
+from uctypes import addressof
+from drivers.bus import SPIDev
+try:
+    from gui.core.arena import buffer
+except ImportError:  # Driver used without the GUI
+    def buffer(n, name=None):
+        return bytearray(n)
+from drivers.double import snapshot
+from drivers.convert import bgr565
 import sys
 # https://github.com/peterhinch/micropython-nano-gui/issues/2
 # The ESP32 does not work reliably in SPI mode 1,1. Waveforms look correct.
@@ -62,18 +71,34 @@ class SSD1331(framebuf.FrameBuffer):
     def rgb(r, g, b):
         return ((r & 0xf8) << 5) | ((g & 0x1c) << 11) | (b & 0xf8) | ((g & 0xe0) >> 5)
 
-    def __init__(self, spi, pincs, pindc, pinrs, height=64, width=96):
-        self.spi = spi
+    # If a Palette is passed the frame buffer is 4 or 8 bit indexed color,
+    # reducing its size by 75% or 50%. Colors are then palette indices.
+    def __init__(self, spi, pincs, pindc, pinrs, height=64, width=96, double=False,
+                 palette=None):
         self.rate = 6660000  # Data sheet: 150ns min clock period
         self.pincs = pincs
         self.pindc = pindc  # 1 = data 0 = cmd
+        self._bus = SPIDev(spi, pincs, pindc, self.rate, _bs, _bs)
+        self.spi = self._bus.spi  # spi may be an SPIBus
+        self._write = self._bus.write  # (buf, dc) No copy or allocation
         self.height = height  # Required by Writer class
         self.width = width
         # Save color mode for use by writer_gui (blit)
-        self.mode = framebuf.RGB565
+        self.palette = palette
+        if palette is None:
+            self.mode = framebuf.RGB565
+            self._bpl = self.width * 2  # Buffer bytes per line
+        else:
+            palette.output(bgr565)  # The display's color sequence
+            self.mode = framebuf.GS4_HMSB if palette.bits == 4 else framebuf.GS8
+            self._bpl = self.width * palette.bits // 8
+            self._linebuf = buffer(self.width * 2, 'line')
         gc.collect()
-        self.buffer = bytearray(self.height * self.width * 2)
+        self.buffer = buffer(self.height * self._bpl, 'frame')
         super().__init__(self.buffer, self.width, self.height, self.mode)
+        self.double = double  # Transfer a copy of the buffer: see snapshot()
+        self._back = buffer(len(self.buffer), 'back') if double else None
+        self._snap = False
         pinrs(0)  # Pulse the reset line
         utime.sleep_ms(1)
         pinrs(1)
@@ -84,14 +109,21 @@ class SSD1331(framebuf.FrameBuffer):
         gc.collect()
         self.show()
 
-    def _write(self, buf, dc):
-        self.spi.init(baudrate=self.rate, polarity=_bs, phase=_bs)
-        self.pincs(1)
-        self.pindc(dc)
-        self.pincs(0)
-        self.spi.write(buf)
-        self.pincs(1)
+    snapshot = snapshot  # Double buffered mode: see drivers/double.py
 
     def show(self, _cmd=b'\x15\x00\x5f\x75\x00\x3f'):  # Pre-allocate
         self._write(_cmd, 0)
-        self._write(self.buffer, 1)
+        buf = self._back if self._snap else self.buffer
+        self._snap = False
+        pal = self.palette
+        if pal is None:
+            self._write(buf, 1)
+        else:  # Convert a line at a time via the palette
+            lb = self._linebuf
+            bw = self._bpl
+            addr = addressof(buf)
+            start = 0
+            while start < len(buf):  # range() with a variable step allocates
+                pal.copy(lb, addr + start, pal.lut, bw)
+                self._write(lb, 1)
+                start += bw
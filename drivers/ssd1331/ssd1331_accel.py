@@ -0,0 +1,223 @@
+# ssd1331_accel.py MicroPython driver for Adafruit 0.96" OLED display using
+# the SSD1331 graphics accelerator.
+# https://www.adafruit.com/product/684
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# A subclass of the 16 bit driver. Rectangles, lines, fills and scrolling are
+# drawn in the frame buffer as usual and are also queued as accelerator
+# commands of a few bytes each. Other drawing (text, blit, pixel) marks the
+# buffer as changed. .show() sends the whole buffer if it has changed,
+# otherwise it sends the queued commands. Drawing never uses the SPI bus, so
+# a bus shared under a lock is only used by .show().
+# Text is drawn by .glyph(), which CWriter calls in place of the native
+# renderer: that writes to the buffer unseen. Code which writes to the buffer
+# other than by the driver's methods must call .changed().
+# The queue is altered by drawing and consumed by .show(), so this driver is
+# unsuitable for threaded refresh (gui.core.threaded), as is the double
+# buffered mode.
+
+# Accelerator commands
+# 0x21, c0, r0, c1, r1, C, B, A  Draw line
+# 0x22, c0, r0, c1, r1, C, B, A, C, B, A  Draw rectangle: outline, fill color
+# 0x23, c0, r0, c1, r1, c2, r2  Copy window to c2, r2
+# 0x25, c0, r0, c1, r1  Clear window
+# 0x26, n  Fill mode: n = 1 rectangles are filled
+
+import framebuf
+from utime import ticks_us, ticks_add, ticks_diff
+from drivers.ssd1331.ssd1331_16bit import SSD1331 as SSD1331_16
+
+# The panel gives no busy indication over SPI so the time taken by each
+# command is estimated. The values are scaled to match the delays used by the
+# Adafruit library for a full screen fill (3ms) and line (1ms).
+_TCMD = 20  # Overhead (us)
+_TFILL = 2  # Fill time per 4 pixels (us)
+_TLINE = 10  # Line time per pixel (us)
+# Beyond this no. of queued commands a full transfer is about as fast.
+_QMAX = 32
+
+# A 1 bit glyph: pixels are mapped to background and foreground colors by a
+# 2 pixel palette.
+_pal = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)
+
+class SSD1331(SSD1331_16):
+
+    def __init__(self, spi, pincs, pindc, pinrs, height=64, width=96):
+        self._dirty = True  # The buffer holds drawing not sent to the display
+        self._queue = []  # (command, fill mode, time) awaiting .show()
+        self._due = ticks_us()  # Time when the accelerator is free
+        self._fmode = -1  # Current fill mode
+        self._bline = bytearray(8)  # Preallocated command buffers
+        self._bline[0] = 0x21
+        self._brect = bytearray(11)
+        self._brect[0] = 0x22
+        self._bcopy = bytearray(7)
+        self._bcopy[0] = 0x23
+        self._bclear = bytearray(5)
+        self._bclear[0] = 0x25
+        super().__init__(spi, pincs, pindc, pinrs, height, width)
+
+    # Wait for completion of the last accelerator command.
+    def _wait(self):
+        while ticks_diff(self._due, ticks_us()) > 0:
+            pass
+
+    # Queue a command for .show(). fmode: fill mode it needs, or -1. t: its
+    # estimated duration. Pointless if the whole buffer is to be sent.
+    def _cmd(self, buf, t, fmode=-1):
+        if not self._dirty:
+            if len(self._queue) < _QMAX:
+                self._queue.append((bytes(buf), fmode, t))
+            else:
+                self.changed()
+
+    # The buffer has changed other than by accelerated drawing: the next
+    # .show() sends it in full.
+    def changed(self):
+        self._dirty = True
+        self._queue.clear()
+
+    # Store a frame buffer color in a command buffer as 6 bit C, B, A values.
+    @staticmethod
+    def _color(buf, idx, c):
+        w = ((c & 0xff) << 8) | (c >> 8)  # Value as sent to the display
+        buf[idx] = (w >> 10) & 0x3e
+        buf[idx + 1] = (w >> 5) & 0x3f
+        buf[idx + 2] = (w << 1) & 0x3e
+
+    @staticmethod
+    def _window(buf, c0, r0, c1, r1):
+        buf[1] = c0
+        buf[2] = r0
+        buf[3] = c1
+        buf[4] = r1
+
+    def _fill_mode(self, n):
+        if n >= 0 and n != self._fmode:
+            self._fmode = n
+            self._write(b'\x26\x01' if n else b'\x26\x00', 0)
+
+    # Clip a rectangle to the display. Return inclusive corners or None.
+    def _clip(self, x, y, w, h):
+        c0 = max(x, 0)
+        r0 = max(y, 0)
+        c1 = min(x + w, self.width) - 1
+        r1 = min(y + h, self.height) - 1
+        if c1 < c0 or r1 < r0:
+            return None
+        return c0, r0, c1, r1
+
+    def _onscreen(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def show(self):
+        if self._dirty:
+            self._wait()
+            super().show()
+            self._dirty = False
+        else:
+            for buf, fmode, t in self._queue:
+                self._wait()
+                self._fill_mode(fmode)
+                self._write(buf, 0)
+                self._due = ticks_add(ticks_us(), t)
+        self._queue.clear()
+
+    def fill(self, c):
+        super().fill(c)
+        # Earlier drawing is overwritten: buffer and display will be identical.
+        self._dirty = False
+        self._queue.clear()
+        if c:
+            self._fill_rect(0, 0, self.width - 1, self.height - 1, c)
+        else:
+            self._window(self._bclear, 0, 0, self.width - 1, self.height - 1)
+            self._cmd(self._bclear, _TCMD + self.width * self.height * _TFILL // 4)
+
+    def _fill_rect(self, c0, r0, c1, r1, c):
+        buf = self._brect
+        self._window(buf, c0, r0, c1, r1)
+        self._color(buf, 5, c)
+        self._color(buf, 8, c)
+        self._cmd(buf, _TCMD + (c1 - c0 + 1) * (r1 - r0 + 1) * _TFILL // 4, 1)
+
+    def fill_rect(self, x, y, w, h, c):
+        super().fill_rect(x, y, w, h, c)
+        r = self._clip(x, y, w, h)
+        if r is not None:
+            self._fill_rect(r[0], r[1], r[2], r[3], c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        super().rect(x, y, w, h, c)
+        if w < 1 or h < 1:
+            return
+        if not (self._onscreen(x, y) and self._onscreen(x + w - 1, y + h - 1)):
+            self.changed()  # Partly visible: the next .show() sends it
+            return
+        buf = self._brect
+        self._window(buf, x, y, x + w - 1, y + h - 1)
+        self._color(buf, 5, c)
+        self._cmd(buf, _TCMD + (w + h) * 2 * _TLINE, 0)
+
+    def line(self, x0, y0, x1, y1, c):
+        super().line(x0, y0, x1, y1, c)
+        if not (self._onscreen(x0, y0) and self._onscreen(x1, y1)):
+            self.changed()
+            return
+        buf = self._bline
+        self._window(buf, x0, y0, x1, y1)
+        self._color(buf, 5, c)
+        self._cmd(buf, _TCMD + max(abs(x1 - x0), abs(y1 - y0), 1) * _TLINE)
+
+    # As with framebuf.scroll the area uncovered is unchanged.
+    def scroll(self, dx, dy):
+        super().scroll(dx, dy)
+        r = self._clip(max(-dx, 0), max(-dy, 0), self.width - abs(dx), self.height - abs(dy))
+        if r is None:
+            return
+        buf = self._bcopy
+        self._window(buf, *r)
+        buf[5] = max(dx, 0)
+        buf[6] = max(dy, 0)
+        self._cmd(buf, _TCMD + (r[2] - r[0] + 1) * (r[3] - r[1] + 1) * _TFILL // 2)
+
+    # Methods drawn in the buffer only.
+    def pixel(self, x, y, c=None):
+        if c is None:
+            return super().pixel(x, y)
+        self.changed()
+        super().pixel(x, y, c)
+
+    def blit(self, *args):
+        self.changed()
+        super().blit(*args)
+
+    # Render a 1 bit glyph in the given colors. Called by CWriter.
+    def glyph(self, fb, x, y, w, h, fgcolor, bgcolor):
+        self.changed()
+        _pal.pixel(0, 0, bgcolor)
+        _pal.pixel(1, 0, fgcolor)
+        super().blit(fb, x, y, -1, _pal)
+
+    def text(self, *args):
+        self.changed()
+        super().text(*args)
+
+    def ellipse(self, *args):
+        self.changed()
+        super().ellipse(*args)
+
+    def poly(self, *args):
+        self.changed()
+        super().poly(*args)
@@ -32,8 +32,16 @@
 import framebuf
 import utime
 import gc
+from drivers.bus import SPIDev
+try:
+    from gui.core.arena import buffer
+except ImportError:  # Driver used without the GUI
+    def buffer(n, name=None):
+        return bytearray(n)
+from drivers.double import snapshot
 import micropython
 from uctypes import addressof
+from drivers.convert import copy, bgr565
 import sys
 # https://github.com/peterhinch/micropython-nano-gui/issues/2
 # The ESP32 does not work reliably in SPI mode 1,1. Waveforms look correct.
@@ -70,21 +78,37 @@ class SSD1351(framebuf.FrameBuffer):
     def rgb(r, g, b):
         return ((r & 0xf8) << 5) | ((g & 0x1c) << 11) | (b & 0xf8) | ((g & 0xe0) >> 5)
 
-    def __init__(self, spi, pincs, pindc, pinrs, height=128, width=128):
+    # If a Palette is passed the frame buffer is 4 or 8 bit indexed color,
+    # reducing its size by 75% or 50%. Colors are then palette indices.
+    def __init__(self, spi, pincs, pindc, pinrs, height=128, width=128, double=False,
+                 palette=None):
         if height not in (96, 128):
             raise ValueError('Unsupported height {}'.format(height))
-        self.spi = spi
         self.rate = 11000000  # See baudrate note above.
         self.pincs = pincs
         self.pindc = pindc  # 1 = data 0 = cmd
+        self._bus = SPIDev(spi, pincs, pindc, self.rate, _bs, _bs)
+        self.spi = self._bus.spi  # spi may be an SPIBus
+        self._write = self._bus.write  # (buf, dc) No copy or allocation
         self.height = height  # Required by Writer class
         self.width = width
         # Save color mode for use by writer_gui (blit)
-        self.mode = framebuf.RGB565
+        self.palette = palette
+        if palette is None:
+            self.mode = framebuf.RGB565
+            self._bpl = self.width * 2  # Buffer bytes per line
+        else:
+            palette.output(bgr565)  # The display's color sequence
+            self.mode = framebuf.GS4_HMSB if palette.bits == 4 else framebuf.GS8
+            self._bpl = self.width * palette.bits // 8
+        self._linebuf = buffer(self.width * 2, 'line')
         gc.collect()
-        self.buffer = bytearray(self.height * self.width * 2)
+        self.buffer = buffer(self.height * self._bpl, 'frame')
         super().__init__(self.buffer, self.width, self.height, self.mode)
         self.mvb = memoryview(self.buffer)
+        self.double = double  # Transfer a copy of the buffer: see snapshot()
+        self._back = buffer(len(self.buffer), 'back') if double else None
+        self._snap = False
         pinrs(0)  # Pulse the reset line
         utime.sleep_ms(1)
         pinrs(1)
@@ -97,31 +121,34 @@ class SSD1351(framebuf.FrameBuffer):
         self.show()
         gc.collect()
 
-    def _write(self, mv, dc):
-        self.spi.init(baudrate=self.rate, polarity=_bs, phase=_bs)
-        self.pincs(1)
-        self.pindc(dc)
-        self.pincs(0)
-        self.spi.write(bytes(mv))
-        self.pincs(1)
+    snapshot = snapshot  # Double buffered mode: see drivers/double.py
+
+    # Send the line at address src, converting indexed color to RGB565 via the
+    # palette. Lines are sent from the line buffer: slicing the frame buffer
+    # would allocate.
+    def _wline(self, src):
+        pal = self.palette
+        if pal is None:
+            copy(self._linebuf, src, self._bpl)
+        else:
+            pal.copy(self._linebuf, src, pal.lut, self._bpl)
+        self._write(self._linebuf, 1)
 
     # Write lines from the framebuf out of order to match the mapping of the
     # SSD1351 RAM to the OLED device.
     def show(self):
-        mvb = self.mvb 
-        bw = self.width * 2  # Width in bytes
-        self._write(b'\x5c', 0)  # Enable data write
+        buf = addressof(self._back if self._snap else self.buffer)
+        self._snap = False
+        bw = self._bpl  # Width in bytes
         if self.height == 128:
+            self._write(b'\x5c', 0)  # Enable data write
             for l in range(128):
                 l0 = (95 - l) % 128  # 95 94 .. 1 0 127 126 .. 96
-                start = l0 * self.width * 2
-                self._write(mvb[start : start + bw], 1)  # Send a line
-        else:
-            for l in range(128):
-                if l < 64:
-                    start = (63 -l) * self.width * 2  # 63 62 .. 1 0
-                elif l < 96:
-                    start = 0
-                else:
-                    start = (191 - l) * self.width * 2  # 127 126 .. 95
-                self._write(mvb[start : start + bw], 1)  # Send a line
+                self._wline(buf + l0 * bw)  # Send a line
+        else:  # Visible rows are RAM rows 0-63 and 96-127: write two windows
+            self._write(b'\x75\x00\x3f\x5c', 0)  # Rows 0-63, enable data write
+            for l in range(63, -1, -1):  # 63 62 .. 1 0
+                self._wline(buf + l * bw)  # Send a line
+            self._write(b'\x75\x60\x7f\x5c', 0)  # Rows 96-127
+            for l in range(95, 63, -1):  # 95 94 .. 64
+                self._wline(buf + l * bw)
@@ -33,8 +33,15 @@
 import framebuf
 import utime
 import gc
-import micropython
 from uctypes import addressof
+from drivers.bus import SPIDev
+try:
+    from gui.core.arena import buffer
+except ImportError:  # Driver used without the GUI
+    def buffer(n, name=None):
+        return bytearray(n)
+from drivers.double import snapshot
+from drivers.convert import table, lut8, bgr565
 
 import sys
 # https://github.com/peterhinch/micropython-nano-gui/issues/2
@@ -48,15 +55,8 @@ _bs = 0 if sys.platform == 'esp32' else 1  # SPI bus state
 # 128*128*2/10500000 = 31.2ms (2 bytes/pixel, baudrate = 10.5MHz)
 # With viper emitter show() takes 47ms vs 41ms for assembler.
 
-@micropython.viper
-def _lcopy(dest:ptr8, source:ptr8, length:int):
-    n = 0
-    for x in range(length):
-        c = source[x]
-        dest[n] = ((c & 3) << 6) | ((c & 0x1c) >> 2)  # Blue green
-        n += 1
-        dest[n] = (c & 0xe0) >> 3  # Red
-        n += 1
+# Lines in 8 bit rrrgggbb format are converted to 16 bit color by table lookup.
+_lut = table(bgr565)
 
 # Initialisation commands in cmd_init:
 # 0xfd, 0x12, 0xfd, 0xb1,  # Unlock command mode
@@ -86,21 +86,26 @@ class SSD1351(framebuf.FrameBuffer):
     def rgb(r, g, b):
         return (r & 0xe0) | ((g >> 3) & 0x1c) | (b >> 6)
 
-    def __init__(self, spi, pincs, pindc, pinrs, height=128, width=128):
+    def __init__(self, spi, pincs, pindc, pinrs, height=128, width=128, double=False):
         if height not in (96, 128):
             raise ValueError('Unsupported height {}'.format(height))
-        self.spi = spi
         self.rate = 20000000  # Data sheet: should support 20MHz
         self.pincs = pincs
         self.pindc = pindc  # 1 = data 0 = cmd
+        self._bus = SPIDev(spi, pincs, pindc, self.rate, _bs, _bs)
+        self.spi = self._bus.spi  # spi may be an SPIBus
+        self._write = self._bus.write  # (buf, dc) No copy or allocation
         self.height = height  # Required by Writer class
         self.width = width
         # Save color mode for use by writer_gui (blit)
         self.mode = framebuf.GS8  # Use 8bit greyscale for 8 bit color.
         gc.collect()
-        self.buffer = bytearray(self.height * self.width)
+        self.buffer = buffer(self.height * self.width, 'frame')
         super().__init__(self.buffer, self.width, self.height, self.mode)
-        self.linebuf = bytearray(self.width * 2)
+        self.double = double  # Transfer a copy of the buffer: see snapshot()
+        self._back = buffer(len(self.buffer), 'back') if double else None
+        self._snap = False
+        self.linebuf = buffer(self.width * 2, 'line')
         pinrs(0)  # Pulse the reset line
         utime.sleep_ms(1)
         pinrs(1)
@@ -113,35 +118,29 @@ class SSD1351(framebuf.FrameBuffer):
         gc.collect()
         self.show()
 
-    def _write(self, buf, dc):
-        self.spi.init(baudrate=self.rate, polarity=_bs, phase=_bs)
-        self.pincs(1)
-        self.pindc(dc)
-        self.pincs(0)
-        self.spi.write(buf)
-        self.pincs(1)
+    snapshot = snapshot  # Double buffered mode: see drivers/double.py
 
     # Write lines from the framebuf out of order to match the mapping of the
     # SSD1351 RAM to the OLED device.
     def show(self):
         lb = self.linebuf
-        buf = memoryview(self.buffer)
-        self._write(b'\x5c', 0)  # Enable data write
+        buf = addressof(self._back if self._snap else self.buffer)
+        self._snap = False
         if self.height == 128:
+            self._write(b'\x5c', 0)  # Enable data write
             for l in range(128):
                 l0 = (95 - l) % 128  # 95 94 .. 1 0 127 126...
                 start = l0 * self.width
-                _lcopy(lb, buf[start : start + self.width], self.width)
+                lut8(lb, buf + start, _lut, self.width)
                 self._write(lb, 1)  # Send a line
-        else:
-            for l in range(128):
-                if l < 64:
-                    start = (63 -l) * self.width
-                    _lcopy(lb, buf[start : start + self.width], self.width)
-                    self._write(lb, 1)  # Send a line
-                elif l < 96:  # This is daft but I can't get setrow to work
-                    self._write(lb, 1)  # Let RAM counter increase
-                else:
-                    start = (191 - l) * self.width
-                    _lcopy(lb, buf[start : start + self.width], self.width)
-                    self._write(lb, 1)  # Send a line
+        else:  # Visible rows are RAM rows 0-63 and 96-127: write two windows
+            self._write(b'\x75\x00\x3f\x5c', 0)  # Rows 0-63, enable data write
+            for l in range(63, -1, -1):  # 63 62 .. 1 0
+                start = l * self.width
+                lut8(lb, buf + start, _lut, self.width)
+                self._write(lb, 1)  # Send a line
+            self._write(b'\x75\x60\x7f\x5c', 0)  # Rows 96-127
+            for l in range(95, 63, -1):  # 95 94 .. 64
+                start = l * self.width
+                lut8(lb, buf + start, _lut, self.width)
+                self._write(lb, 1)
@@ -0,0 +1,143 @@
+# test_window.py Host-side check of SSD1351 RAM addressing.
+# No hardware needed: run from the repo root under the MicroPython Unix port
+# micropython -m drivers.ssd1351.test_window
+# ssd1351.py uses the Thumb assembler so only ssd1351_generic.py and
+# ssd1351_16bit.py can be tested here.
+
+# The emulated controller parses the command stream. 0x15 and 0x75 set the
+# column and row windows and move the address pointer to the window start.
+# 0x5c enables RAM writes. Each pixel is two data bytes and the pointer
+# advances along a row then wraps within the window. Remap 0x74 (COM scan
+# reversed, display start 0) shows RAM row (95 - y) % 128 at screen line y of
+# a 128 row panel. A 96 row panel shows RAM rows 63..0 then 127..96. The test
+# checks that each visible RAM row holds the right line after show() and that
+# no other row is written.
+
+import gc
+import drivers.ssd1351.ssd1351_generic as generic
+import drivers.ssd1351.ssd1351_16bit as sixteen
+
+# No. of parameter bytes of each command in the init sequence.
+_NPARAMS = {0x15: 2, 0x75: 2, 0xfd: 1, 0xb3: 1, 0xca: 1, 0xa0: 1, 0xa1: 1,
+            0xa2: 1, 0xb5: 1, 0xab: 1, 0xb1: 1, 0xbe: 1, 0xc1: 3, 0xc7: 1,
+            0xb4: 3, 0xb6: 1}
+
+# Emulates the SPI interface and display RAM. Pass as the SPI instance, with
+# .dc as the DC pin and .pin as CS and reset.
+class Controller:
+    def __init__(self):
+        self.ram = [None] * 128  # Rows: bytearray(256) once written
+        self.data = 0  # State of DC
+        self.cmd = bytearray()
+        self.c0, self.c1, self.r0, self.r1 = 0, 127, 0, 127
+        self.x = self.y = 0
+        self.wr = False  # RAM write enabled
+        self.half = None  # First byte of a pixel
+        self.written = set()  # Rows written since reset()
+
+    def dc(self, v=None):
+        if v is not None:
+            self.data = v
+
+    def pin(self, v=None):
+        pass
+
+    def init(self, **kwargs):
+        pass
+
+    def reset(self):
+        self.written = set()
+
+    def write(self, buf):
+        for v in buf:
+            if self.data:
+                self._data(v)
+            else:
+                self._cmd(v)
+
+    def _cmd(self, v):
+        cmd = self.cmd
+        cmd.append(v)
+        c = cmd[0]
+        if len(cmd) <= _NPARAMS.get(c, 0):
+            return  # Awaiting parameters
+        self.wr = c == 0x5c
+        if c == 0x15:
+            self.c0, self.c1 = cmd[1], cmd[2]
+        elif c == 0x75:
+            self.r0, self.r1 = cmd[1], cmd[2]
+        if c in (0x15, 0x75, 0x5c):
+            self.x, self.y = self.c0, self.r0
+            self.half = None
+        self.cmd = bytearray()
+
+    def _data(self, v):
+        if not self.wr:
+            raise OSError('Data sent without write RAM command.')
+        if self.half is None:
+            self.half = v
+            return
+        y = self.y
+        if self.ram[y] is None:
+            self.ram[y] = bytearray(256)
+        self.ram[y][self.x * 2] = self.half
+        self.ram[y][self.x * 2 + 1] = v
+        self.half = None
+        self.written.add(y)
+        self.x += 1
+        if self.x > self.c1:
+            self.x = self.c0
+            self.y += 1
+            if self.y > self.r1:
+                self.y = self.r0
+
+# RAM row displayed at screen line y.
+def ram_row(y, height):
+    if height == 128:
+        return (95 - y) % 128
+    return 63 - y if y < 64 else 191 - y
+
+# Return the bytes expected in RAM for line y of the frame buffer.
+def generic_line(ssd, y):
+    lut = generic._lut
+    w = ssd.width
+    line = bytearray(w * 2)
+    for x in range(w):
+        c = ssd.buffer[y * w + x] * 2
+        line[x * 2] = lut[c]
+        line[x * 2 + 1] = lut[c + 1]
+    return line
+
+def sixteen_line(ssd, y):
+    bw = ssd.width * 2
+    return ssd.buffer[y * bw : (y + 1) * bw]
+
+def test(name, cls, expected, height):
+    ctrl = Controller()
+    ssd = cls(ctrl, ctrl.pin, ctrl.dc, ctrl.pin, height=height)
+    for y in range(height):  # Make every line distinct
+        for x in range(ssd.width):
+            ssd.pixel(x, y, (y * 131 + x * 7) & 0xff)
+    ctrl.reset()
+    ssd.show()
+    ok = True
+    rows = set()
+    for y in range(height):
+        r = ram_row(y, height)
+        rows.add(r)
+        if ok and ctrl.ram[r] != expected(ssd, y):  # Report the first error
+            print('{} {} rows: line {} not in RAM row {}'.format(name, height, y, r))
+            ok = False
+    extra = ctrl.written - rows
+    if extra:
+        print('{} {} rows: invisible RAM rows written {}'.format(name, height, sorted(extra)))
+        ok = False
+    print('{} {} rows: {}'.format(name, height, 'pass' if ok else 'FAIL'))
+    gc.collect()
+    return ok
+
+results = []
+for height in (96, 128):
+    results.append(test('ssd1351_generic', generic.SSD1351, generic_line, height))
+    results.append(test('ssd1351_16bit', sixteen.SSD1351, sixteen_line, height))
+print('All tests passed.' if all(results) else 'Tests FAILED.')
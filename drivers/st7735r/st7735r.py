@@ -19,29 +19,27 @@
 from time import sleep_ms
 import framebuf
 import gc
-import micropython
-
-# Datasheet para 8.4 scl write cycle 66ns == 15MHz
-
-# _lcopy: copy a line in 8 bit format to one in 12 bit RGB444. para 9.8.20.
+from uctypes import addressof
+from drivers.bus import SPIDev
+try:
+    from gui.core.arena import buffer
+except ImportError:  # Driver used without the GUI
+    def buffer(n, name=None):
+        return bytearray(n)
+from drivers.double import snapshot
+from drivers.convert import table, lut8_12, rgb444
+
+# Datasheet para 8.4 scl write cycle 66ns == 15MHz. The bus is set to 12MHz,
+# mode 0 whenever another device has used it since this one.
+
+# Lines in 8 bit format are converted to 12 bit RGB444. para 9.8.20.
 # 2 bytes become 3 in destination. Source format:
 # < D7  D6  D5  D4  D3  D2  D1  D0>
 # <R02 R01 R00 G02 G01 G00 B01 B00> <R12 R11 R10 G12 G11 G10 B11 B10>
 # dest:
 # <R02 R01 R00 0 G02 G01 G00 0> <B01 B00 0 0 R12 R11 R10 0> <G12 G11 G10 0 B11 B10 0 0>
 
-@micropython.viper
-def _lcopy(dest:ptr8, source:ptr8, length:int):
-    n = 0
-    for x in range(0, length, 2):
-        c = source[x]
-        d = source[x + 1]
-        dest[n] = (c & 0xe0) | ((c & 0x1c) >> 1)  # R0 G0
-        n += 1
-        dest[n] = ((c & 3) << 6) | ((d & 0xe0) >> 4)  # B0 R1
-        n += 1
-        dest[n] = ((d & 0x1c) << 3) | ((d & 3) << 2)  # G1 B1
-        n += 1
+_lut = table(rgb444)  # Line conversion table for lut8_12
 
 class ST7735R(framebuf.FrameBuffer):
     # Convert r, g, b in range 0-255 to an 8 bit colour value
@@ -51,22 +49,30 @@ class ST7735R(framebuf.FrameBuffer):
         return (r & 0xe0) | ((g >> 3) & 0x1c) | (b >> 6)
 
     # rst and cs are active low, SPI is mode 0
-    def __init__(self, spi, cs, dc, rst, height=128, width=160):
-        self._spi = spi
+    # If init is False the hardware is not initialised: the application must
+    # run the .ainit() coroutine.
+    def __init__(self, spi, cs, dc, rst, height=128, width=160, double=False, init=True):
         self._rst = rst  # Pins
         self._dc = dc
         self._cs = cs
+        self.rate = 12_000_000  # See baudrate note above.
+        self._bus = SPIDev(spi, cs, dc, self.rate, 0, 0)
+        self._spi = self._bus.spi  # spi may be an SPIBus
         self.height = height  # Required by Writer class
         self.width = width
         # Save color mode for use by writer_gui (blit)
         self.mode = framebuf.GS8  # Use 8bit greyscale for 8 bit color.
         gc.collect()
-        self.buffer = bytearray(height * width)
-        self._mvb = memoryview(self.buffer)
+        self.buffer = buffer(height * width, 'frame')
+        self.double = double  # Transfer a copy of the buffer: see snapshot()
+        self._back = buffer(len(self.buffer), 'back') if double else None
+        self._snap = False
         super().__init__(self.buffer, width, height, self.mode)
-        self._linebuf = bytearray(int(width * 3 // 2))  # 12 bit color out
-        self._init()
-        self.show()
+        self._linebuf = buffer(int(width * 3 // 2), 'line')  # 12 bit color out
+        if init:
+            for t in self._init():
+                sleep_ms(t)
+            self.show()
 
     # Hardware reset
     def _hwreset(self):
@@ -80,31 +86,30 @@ class ST7735R(framebuf.FrameBuffer):
 
     # Write a command, a bytes instance (in practice 1 byte).
     def _wcmd(self, buf):
-        self._dc(0)
-        self._cs(0)
-        self._spi.write(buf)
-        self._cs(1)
+        self._bus.write(buf, 0)
 
     # Write a command followed by a data arg.
     def _wcd(self, c, d):
-        self._dc(0)
-        self._cs(0)
-        self._spi.write(c)
-        self._cs(1)
-        self._dc(1)
-        self._cs(0)
-        self._spi.write(d)
-        self._cs(1)
-
-    # Initialise the hardware. Blocks 500ms.
+        self._bus.write(c, 0)
+        self._bus.write(d, 1)
+
+    # Initialise the hardware without blocking the scheduler. The first
+    # refresh provides the initial display contents: no blank frame is sent.
+    async def ainit(self):
+        import uasyncio as asyncio
+        for t in self._init():
+            await asyncio.sleep_ms(t)
+
+    # Generator: initialise the hardware, yielding each delay (ms) needed before
+    # the next step. Delays total 516ms.
     def _init(self):
         self._hwreset()  # Hardware reset. Blocks 3ms
         cmd = self._wcmd
         wcd = self._wcd
         cmd(b'\x01')  # SW reset datasheet specifies > 120ms
-        sleep_ms(150)
+        yield 150
         cmd(b'\x11')  # SLPOUT
-        sleep_ms(256)  # Adafruit delay (datsheet 120ms)
+        yield 256  # Adafruit delay (datsheet 120ms)
         wcd(b'\xb1', b'\x01\x2C\x2D')  # FRMCTRL1
         wcd(b'\xb2', b'\x01\x2C\x2D')  # FRMCTRL2
         wcd(b'\xb3', b'\x01\x2C\x2D\x01\x2C\x2D')  # FRMCTRL3
@@ -128,20 +133,45 @@ class ST7735R(framebuf.FrameBuffer):
         wcd(b'\x2b', int.to_bytes(self.height, 4, 'big'))  # RASET
 
         cmd(b'\x13')  # NORON
-        sleep_ms(10)
+        yield 10
         cmd(b'\x29')  # DISPON
-        sleep_ms(100)
+        yield 100
+
+    snapshot = snapshot  # Double buffered mode: see drivers/double.py
 
     def show(self):  # Blocks 36ms on Pyboard D at stock frequency (160*128)
         wd = self.width
         ht = self.height
         lb = self._linebuf
-        buf = self._mvb
-        self._dc(0)
-        self._cs(0)
-        self._spi.write(b'\x2c')  # RAMWR
-        self._dc(1)
-        for start in range(wd * (ht - 1), -1, - wd):  # For each line
-            _lcopy(lb, buf[start :], wd)  # Copy and map colors (68us)
+        buf = addressof(self._back if self._snap else self.buffer)
+        self._snap = False
+        # Set the full window: show_iter() leaves RASET set to its last segment
+        self._bus.cmd_hh(0x2a, 0, wd)  # CASET
+        self._bus.cmd_hh(0x2b, 0, ht)  # RASET
+        self._bus.begin(0x2c)  # RAMWR
+        start = wd * (ht - 1)
+        while start >= 0:  # For each line. range() with a variable step allocates.
+            lut8_12(lb, buf + start, _lut, wd)  # Copy and map colors (68us)
             self._spi.write(lb)
-        self._cs(1)
+            start -= wd
+        self._bus.end()
+
+    # Generator: write the buffer in segments, each with its own row address
+    # window. Yields after each segment with CS high so that other devices may
+    # use the SPI bus.
+    def show_iter(self, split=4):
+        wd = self.width
+        ht = self.height
+        lb = self._linebuf
+        buf = addressof(self._back if self._snap else self.buffer)
+        self._snap = False
+        seg = -(-ht // split)  # Lines per segment
+        for row in range(0, ht, seg):  # Display rows: buffer lines in reverse
+            end = min(row + seg, ht)
+            self._bus.cmd_hh(0x2b, row, ht)  # RASET
+            self._bus.begin(0x2c)  # RAMWR
+            for start in range(wd * (ht - 1 - row), wd * (ht - 1 - end), - wd):
+                lut8_12(lb, buf + start, _lut, wd)
+                self._spi.write(lb)
+            self._bus.end()
+            yield
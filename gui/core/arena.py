@@ -0,0 +1,65 @@
+# arena.py Preallocation of long lived buffers from a single block of RAM
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# Frame buffers, line buffers and glyph scratch buffers are allocated at
+# different times: the gaps left between them fragment the heap and a long
+# running application may eventually fail to allocate a block which the total
+# free RAM could accommodate. If an arena is reserved at boot, before anything
+# else is imported, these buffers are carved out of one contiguous block. They
+# live for the life of the application and are never freed.
+# Without an arena buffer() returns a bytearray: drivers behave as before.
+# Usage (at the start of color_setup.py):
+# from gui.core.arena import reserve, report
+# reserve(20_000)  # Bytes: the total of the buffers. See report().
+# ... create the display and GUI
+# report()  # Print allocations and headroom
+
+import gc
+
+class Arena():
+    def __init__(self, size):
+        gc.collect()
+        self.size = size
+        self._mv = memoryview(bytearray(size))
+        self._offs = 0
+        self.items = []  # (name, size) of each allocation
+
+    # Return a zeroed memoryview of n bytes, aligned on a word boundary.
+    def take(self, n, name='buffer'):
+        start = (self._offs + 3) & ~3
+        if start + n > self.size:
+            raise MemoryError('Arena: {} needs {} bytes, {} free.'.format(name, n, self.free()))
+        self._offs = start + n
+        self.items.append((name, n))
+        return self._mv[start : start + n]
+
+    def free(self):
+        return max(self.size - ((self._offs + 3) & ~3), 0)
+
+    def report(self):
+        for name, n in self.items:
+            print('{:<16s}{:>8d}'.format(name, n))
+        print('Arena: {} bytes used, {} free.'.format(self._offs, self.free()))
+
+_arena = None
+
+# Reserve the arena. Call once at boot before creating the display.
+def reserve(size):
+    global _arena
+    if _arena is not None:
+        raise ValueError('Arena already reserved.')
+    _arena = Arena(size)
+    return _arena
+
+# Allocate a long lived buffer from the arena if there is one.
+def buffer(n, name='buffer'):
+    return bytearray(n) if _arena is None else _arena.take(n, name)
+
+# Print arena allocations and the remaining headroom.
+def report():
+    if _arena is not None:
+        _arena.report()
+    gc.collect()
+    print('Heap: {} bytes free.'.format(gc.mem_free()))
@@ -0,0 +1,78 @@
+# colormap.py Conversion of r, g, b values to a device's native colors
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# One ColorMap is created per device, on first use. The conversion method is
+# chosen once according to the driver:
+# Drivers with a palette (e.g. ILI9341): the nearest palette entry. Results
+# are cached as the search is relatively slow.
+# Drivers with an rgb method: that method, e.g. rrrgggbb or RGB565.
+# Monochrome drivers: threshold on luminance.
+# Usage:
+# from gui.core.colormap import colormap
+# cm = colormap(ssd)
+# ORANGE = cm.rgb(255, 128, 0)
+
+import framebuf
+from gui.core.writer import get_state
+
+_MONO = (framebuf.MONO_VLSB, framebuf.MONO_HLSB, framebuf.MONO_HMSB)
+_CACHE = 32  # Maximum no. of cached palette lookups
+
+class ColorMap():
+    def __init__(self, device):
+        self.palette = getattr(device, 'palette', None)
+        self._cache = {}
+        if self.palette is not None:
+            self._conv = self._nearest
+        elif hasattr(device, 'rgb'):
+            self._conv = device.rgb
+        elif getattr(device, 'mode', framebuf.MONO_VLSB) in _MONO:
+            self._conv = self._mono
+        else:
+            raise ValueError('Device has no rgb method or palette.')
+
+    # Convert r, g, b in range 0-255 to a native color.
+    def rgb(self, r, g, b):
+        return self._conv(r, g, b)
+
+    # Accept either a native color or an (r, g, b) tuple.
+    def native(self, c):
+        return self._conv(*c) if isinstance(c, tuple) else c
+
+    # Discard cached lookups. Call after changing palette entries.
+    def flush(self):
+        self._cache = {}
+
+    @staticmethod
+    def _mono(r, g, b):
+        return int((r * 77 + g * 151 + b * 28) >> 8 >= 128)
+
+    def _nearest(self, r, g, b):
+        key = (r << 16) | (g << 8) | b
+        cache = self._cache
+        if key in cache:
+            return cache[key]
+        pal = self.palette
+        best = 0
+        dmin = 0x40000  # > 3 * 255 ** 2
+        for idx in range(len(pal)):
+            pr, pg, pb = pal[idx]
+            d = (pr - r) ** 2 + (pg - g) ** 2 + (pb - b) ** 2
+            if d < dmin:
+                dmin = d
+                best = idx
+                if not d:
+                    break
+        if len(cache) >= _CACHE:
+            cache.clear()
+        cache[key] = best
+        return best
+
+# Return the ColorMap for a device, creating it if necessary.
+def colormap(device):
+    ds = get_state(device)
+    if ds.cmap is None:
+        ds.cmap = ColorMap(device)
+    return ds.cmap
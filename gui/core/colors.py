@@ -1,20 +1,28 @@
-# colors.py Standard color constants for nano-gui as a 4bit map
+# colors.py Standard color constants for nano-gui
 
 # Released under the MIT License (MIT). See LICENSE.
 # Copyright (c) 2020 Peter Hinch
 
-from color_setup import SSD
+# Constants are converted once, at import, to the native format of the display
+# in color_setup. This works with any color driver including those with a
+# palette such as the ILI9341, where the nearest palette entry is used.
+# rgb(r, g, b) converts further colors in the same way.
 
-GREEN = SSD.rgb(0, 255, 0)
-RED = SSD.rgb(255, 0, 0)
-LIGHTRED = SSD.rgb(140, 0, 0)
-BLUE = SSD.rgb(0, 0, 255)
-YELLOW = SSD.rgb(255, 255, 0)
+from color_setup import ssd as _ssd
+from gui.core.colormap import colormap
+
+rgb = colormap(_ssd).rgb
+
+GREEN = rgb(0, 255, 0)
+RED = rgb(255, 0, 0)
+LIGHTRED = rgb(140, 0, 0)
+BLUE = rgb(0, 0, 255)
+YELLOW = rgb(255, 255, 0)
 BLACK = 0
-WHITE = SSD.rgb(255, 255, 255)
-GREY = SSD.rgb(100, 100, 100)
-MAGENTA = SSD.rgb(255, 0, 255)
-CYAN = SSD.rgb(0, 255, 255)
-LIGHTGREEN = SSD.rgb(0, 100, 0)
-DARKGREEN = SSD.rgb(0, 80, 0)
-DARKBLUE = SSD.rgb(0, 0, 90)
\ No newline at end of file
+WHITE = rgb(255, 255, 255)
+GREY = rgb(100, 100, 100)
+MAGENTA = rgb(255, 0, 255)
+CYAN = rgb(0, 255, 255)
+LIGHTGREEN = rgb(0, 100, 0)
+DARKGREEN = rgb(0, 80, 0)
+DARKBLUE = rgb(0, 0, 90)
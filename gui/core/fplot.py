@@ -23,7 +23,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-from gui.core.nanogui import DObject, circle
+from gui.core.nanogui import DObject, circle, offscreen
 from cmath import rect, pi
 from micropython import const
 from array import array
@@ -58,7 +58,7 @@ class Curve():
         self.graph = graph
         self.origin = origin
         self.excursion = excursion
-        self.color = color
+        self.color = graph._native(color)
         self.lastpoint = None
         self.newpoint = None
         if populate is not None and self._valid(populate):
@@ -178,25 +178,110 @@ class TSequence(Curve):
         self.point()
 
 
+# Decimating curve for large datasets. Each pixel column of the graph holds the
+# min and max Y pixel of the line segments which crossed it, so RAM and drawing
+# time are bounded by the graph width rather than the number of points.
+class MinMaxCurve(Curve):
+    def __init__(self, graph, color, populate=None, origin=(0, 0), excursion=(1, 1)):
+        super().__init__(graph, color, None, origin, excursion)
+        self.ncols = graph.width + 1
+        self.ymin = array('h', (0 for _ in range(self.ncols)))
+        self.ymax = array('h', (0 for _ in range(self.ncols)))
+        self.clear()
+        if populate is not None and self._valid(populate):
+            for x, y in populate:
+                self.point(x, y)
+            self.show()
+
+    def clear(self):  # Discard all data
+        ymin = self.ymin
+        ymax = self.ymax
+        for n in range(self.ncols):
+            ymin[n] = 0x7fff  # Empty column
+            ymax[n] = -1
+        self.lastpoint = None
+
+    def _add(self, col, yp):
+        if yp < self.ymin[col]:
+            self.ymin[col] = yp
+        if yp > self.ymax[col]:
+            self.ymax[col] = yp
+
+    # Accumulate a point. Passing no args starts a new segment (discontinuity).
+    # Points with X out of range, or outside the graph's columns, are discarded;
+    # Y is clipped to the graph.
+    def point(self, x=None, y=None):
+        if x is None or y is None:
+            self.lastpoint = None
+            return
+        xs, ys = self._scale(x, y)
+        g = self.graph
+        col = round(g.xp_origin + xs * g.x_axis_len) - g.x0
+        if xs < _XMIN or xs > _XMAX or col < 0 or col >= self.ncols:
+            self.lastpoint = None
+            return
+        yp = min(max(g.yp_origin - max(min(ys, _YMAX), _YMIN) * g.y_axis_len, g.y0), g.y1)
+        self._add(col, round(yp))
+        if self.lastpoint is not None:
+            lcol, lyp = self.lastpoint
+            dc = col - lcol
+            if dc:  # Segment spans columns: add its Y range within each column
+                step = 1 if dc > 0 else -1
+                dy = (yp - lyp) / abs(dc)
+                y = lyp + dy / 2  # Boundary between last column and the next
+                self._add(lcol, round(y))
+                for c in range(lcol + step, col, step):
+                    self._add(c, round(y))  # Entry boundary
+                    y += dy
+                    self._add(c, round(y))  # Exit boundary
+                self._add(col, round(y))
+        self.lastpoint = (col, yp)
+
+    # Draw the envelope: one vertical line per populated column.
+    def show(self):
+        dev = self.graph.device
+        x0 = self.graph.x0
+        ymin = self.ymin
+        ymax = self.ymax
+        color = self.color
+        for c in range(self.ncols):
+            hi = ymax[c]
+            if hi >= 0:
+                lo = ymin[c]
+                dev.vline(x0 + c, lo, hi - lo + 1, color)
+
+
 class Graph(DObject):
-    def __init__(self, writer, row, col, height, width, fgcolor, bgcolor, bdcolor, gridcolor):
+    def __init__(self, writer, row, col, height, width, fgcolor, bgcolor, bdcolor, gridcolor, cache):
         super().__init__(writer, row, col, height, width, fgcolor, bgcolor, bdcolor)
         super().show()  # Draw border
         self.x0 = col
         self.x1 = col + width
         self.y0 = row
         self.y1 = row + height
-        if gridcolor is None:
-            gridcolor = self.fgcolor
-        self.gridcolor = gridcolor
+        self.gridcolor = self.fgcolor if gridcolor is None else self._native(gridcolor)
+        if cache and not getattr(self.device, 'readable', True):
+            raise ValueError('cache=True requires a display which can be read back.')
+        self.cache = cache
+        self._bg = None  # Cached background image
+
+    # Copy the freshly drawn background (which extends to x1, y1) off-screen.
+    def _save(self):
+        if self.cache:
+            if self._bg is None:
+                self._bg = offscreen(self.device, self.x1 - self.x0 + 1, self.y1 - self.y0 + 1)
+            self._bg.blit(self.device, -self.x0, -self.y0)
 
     def clear(self):
-        self.show()  # Clear working area
+        if self._bg is None:
+            self.show()  # Clear working area
+        else:
+            self.device.blit(self._bg, self.x0, self.y0)
 
 class CartesianGraph(Graph):
     def __init__(self,  writer, row, col, *, height=90, width = 120, fgcolor=None, bgcolor=None, bdcolor=None,
-                 gridcolor=None, xdivs=10, ydivs=10, xorigin=5, yorigin=5):
-        super().__init__(writer, row, col, height, width, fgcolor, bgcolor, bdcolor, gridcolor)
+                 gridcolor=None, xdivs=10, ydivs=10, xorigin=5, yorigin=5, cache=False):
+        super().__init__(writer, row, col, height, width, fgcolor, bgcolor, bdcolor, gridcolor, cache)
         self.xdivs = xdivs
         self.ydivs = ydivs
         self.x_axis_len = max(xorigin, xdivs - xorigin) * width / xdivs # Max distance from origin in pixels
@@ -227,6 +312,7 @@ class CartesianGraph(Graph):
                 color = self.fgcolor if line == self.xorigin else self.gridcolor
                 xpos = round(x0 + dx * line)
                 ssd.vline(xpos, y0, y1 - y0, color)
+        self._save()
 
     # Called by Curve
     def line(self, start, end, color): # start and end relative to origin and scaled -1 .. 0 .. +1
@@ -238,8 +324,8 @@ class CartesianGraph(Graph):
 
 class PolarGraph(Graph):
     def __init__(self, writer, row, col, *, height=90, fgcolor=None, bgcolor=None, bdcolor=None,
-                 gridcolor=None, adivs=3, rdivs=4):
-        super().__init__(writer, row, col, height, height, fgcolor, bgcolor, bdcolor, gridcolor)
+                 gridcolor=None, adivs=3, rdivs=4, cache=False):
+        super().__init__(writer, row, col, height, height, fgcolor, bgcolor, bdcolor, gridcolor, cache)
         self.adivs = adivs * 2  # No. of divisions of Pi radians
         self.rdivs = rdivs
         self.radius = round(height / 2) # Unit: pixels
@@ -267,6 +353,7 @@ class PolarGraph(Graph):
                 v *= m
         ssd.vline(x0 + radius, y0, diam, self.fgcolor)
         ssd.hline(x0, y0 + radius, diam, self.fgcolor)
+        self._save()
 
     def cline(self, start, end, color): # start and end are complex, 0 <= magnitude <= 1
         height = self.radius  # Unit: pixels
@@ -0,0 +1,302 @@
+# image.py Render run length encoded images to a framebuf based device
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# Images are created by utils/img_to_py.py as either a Python module (which
+# may be frozen so that the data stays in flash) or a binary file. Pixels are
+# stored as palette indices, run length encoded in row-major order. Runs may
+# span rows. Encodings:
+# bits == 4: one byte per run: (length - 1) << 4 | index. Up to 16 colors.
+# bits == 8: two bytes per run: length - 1, index. Up to 256 colors.
+# Binary file layout: a header (see _HDR), the palette (r, g, b bytes per
+# entry) followed by the runs.
+# Runs are decoded by a viper kernel writing directly to the buffer of a device
+# in GS8, RGB565, GS4_HMSB or a mono format (a driver or an Offscreen). A banded
+# display records the image as one operation, decoded into the strip for each
+# band. Other devices fall back to one hline or fill_rect call per run.
+
+# Usage:
+# from gui.core.image import draw, ImageFile
+# import splash  # Python image module
+# draw(ssd, splash, 0, 0)
+# draw(ssd, ImageFile('icon.bin'), 10, 10)
+
+import framebuf
+import micropython
+from micropython import const
+import ustruct
+from array import array
+from gui.core.colormap import colormap
+
+_HDR = '<2sHHBBh'  # Magic, width, height, bits, colors - 1, key
+_MAGIC = b'RL'
+
+# Kernel destination formats
+_GS8 = const(0)
+_RGB565 = const(1)
+_GS4 = const(2)
+_HLSB = const(3)
+_HMSB = const(4)
+_VLSB = const(5)
+_FORMATS = {framebuf.GS8: _GS8, framebuf.RGB565: _RGB565, framebuf.GS4_HMSB: _GS4,
+            framebuf.MONO_HLSB: _HLSB, framebuf.MONO_HMSB: _HMSB, framebuf.MONO_VLSB: _VLSB}
+
+# Kernel parameters: indices into an int array. Values are biased to be
+# non-negative, and x and y carry the decoding position between chunks.
+_NBYTES = const(0)  # Length of the chunk
+_FMT = const(1)
+_STRIDE = const(2)  # Pixels per row of the destination
+_DW = const(3)  # Destination width and height
+_DH = const(4)
+_COL = const(5)  # Image origin + _BIAS
+_ROW = const(6)
+_IW = const(7)  # Image width
+_YMAX = const(8)  # Image rows to decode
+_KEY = const(9)  # key + 1
+_FOUR = const(10)  # 4 bit runs
+_X = const(11)
+_Y = const(12)
+_BIAS = const(0x10000)
+
+# Decode a chunk of runs into dest, clipping to its bounds. cols holds the
+# device color of each palette index. Return 1 when decoding is complete.
+@micropython.viper
+def _decode(dest, src:ptr8, cols:ptr16, par:ptr32) -> int:
+    d8 = ptr8(dest)
+    d16 = ptr16(dest)
+    nbytes = int(par[_NBYTES])
+    fmt = int(par[_FMT])
+    stride = int(par[_STRIDE])
+    dw = int(par[_DW])
+    dh = int(par[_DH])
+    col = int(par[_COL]) - _BIAS
+    row = int(par[_ROW]) - _BIAS
+    w = int(par[_IW])
+    ymax = int(par[_YMAX])
+    key = int(par[_KEY]) - 1
+    four = int(par[_FOUR])
+    x = int(par[_X])
+    y = int(par[_Y])
+    i = 0
+    while i < nbytes and y < ymax:
+        if four:
+            n = (src[i] >> 4) + 1
+            idx = src[i] & 0x0f
+            i += 1
+        else:
+            n = src[i] + 1
+            idx = src[i + 1]
+            i += 2
+        if idx == key:  # Transparent: skip the run
+            x += n
+            while x >= w:
+                x -= w
+                y += 1
+            continue
+        c = int(cols[idx])
+        while n > 0 and y < ymax:
+            m = w - x
+            if m > n:
+                m = n
+            yd = row + y
+            if yd >= 0:
+                a = col + x
+                b = a + m
+                if a < 0:
+                    a = 0
+                if b > dw:
+                    b = dw
+                p = yd * stride
+                while a < b:
+                    if fmt == _GS8:
+                        d8[p + a] = c
+                    elif fmt == _RGB565:
+                        d16[p + a] = c
+                    elif fmt == _GS4:
+                        j = (p + a) >> 1
+                        if a & 1:
+                            d8[j] = (d8[j] & 0xf0) | c
+                        else:
+                            d8[j] = (d8[j] & 0x0f) | (c << 4)
+                    else:
+                        if fmt == _HLSB:
+                            j = (p + a) >> 3
+                            bit = 0x80 >> (a & 7)
+                        elif fmt == _HMSB:
+                            j = (p + a) >> 3
+                            bit = 1 << (a & 7)
+                        else:  # _VLSB
+                            j = (yd >> 3) * stride + a
+                            bit = 1 << (yd & 7)
+                        if c:
+                            d8[j] = d8[j] | bit
+                        else:
+                            d8[j] = d8[j] & (0xff ^ bit)
+                    a += 1
+            x += m
+            n -= m
+            if x >= w:
+                x = 0
+                y += 1
+    par[_X] = x
+    par[_Y] = y
+    return 1 if y >= ymax else 0
+
+# Framebuf rounds the stride of packed formats up to a whole byte.
+def _stride(fmt, width):
+    if fmt == _HLSB or fmt == _HMSB:
+        return (width + 7) & ~7
+    if fmt == _GS4:
+        return (width + 1) & ~1
+    return width
+
+# Bytes needed by a buffer of a given format and size.
+def _size(fmt, stride, height):
+    if fmt == _RGB565:
+        return stride * height * 2
+    if fmt == _GS8:
+        return stride * height
+    if fmt == _GS4:
+        return stride * height // 2
+    if fmt == _VLSB:
+        return stride * ((height + 7) >> 3)
+    return stride * height // 8
+
+# Yield an image's runs: from flash for a module, chunks for an ImageFile.
+def _chunks(img):
+    return img.chunks() if isinstance(img, ImageFile) else (img.data(),)
+
+# An image stored in a binary file. Only the header and palette are held in
+# RAM: runs are read in chunks of a given size when the image is drawn.
+class ImageFile():
+    def __init__(self, fn, chunk=256):
+        self.fn = fn
+        self.chunk = chunk & ~1  # Two byte runs must not span chunks
+        with open(fn, 'rb') as f:
+            hdr = f.read(ustruct.calcsize(_HDR))
+            magic, self._width, self._height, self._bits, n, self._key = ustruct.unpack(_HDR, hdr)
+            if magic != _MAGIC:
+                raise ValueError('{} is not an image file.'.format(fn))
+            self._palette = f.read((n + 1) * 3)
+        self._offs = len(hdr) + len(self._palette)
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+    def bits(self):
+        return self._bits
+
+    def key(self):
+        return self._key
+
+    def palette(self):
+        return self._palette
+
+    # Yield the runs as a sequence of memoryviews into a single buffer.
+    def chunks(self):
+        buf = bytearray(self.chunk)
+        mv = memoryview(buf)
+        with open(self.fn, 'rb') as f:
+            f.seek(self._offs)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                yield mv[:n]
+
+# Convert an image palette to a list of device colors.
+def _colors(device, pal):
+    rgb = colormap(device).rgb
+    return [rgb(pal[i], pal[i + 1], pal[i + 2]) for i in range(0, len(pal), 3)]
+
+# Decode an image into a buffer of a given framebuf mode and size, whose top
+# row is row y of the display. cols is an array('H') of device colors. Called
+# directly for a device or, on a banded display, once per band.
+def _render(buf, mode, width, height, y, img, row, col, cols, key):
+    row -= y
+    w = img.width()
+    ymax = min(img.height(), height - row)  # Clip at bottom
+    if ymax <= 0 or row + img.height() <= 0 or col >= width or col + w <= 0:
+        return
+    fmt = _FORMATS[mode]
+    par = array('i', (0, fmt, _stride(fmt, width), width, height, col + _BIAS, row + _BIAS,
+                      w, ymax, key + 1, img.bits() == 4, 0, 0))
+    src = _chunks(img)
+    for data in src:
+        par[_NBYTES] = len(data)
+        if _decode(buf, data, cols, par):
+            break
+    if not isinstance(src, tuple):
+        src.close()  # Close the file
+
+# Fallback for a device whose buffer cannot be written directly: each run is
+# drawn with a single hline or fill_rect call. The framebuf clips to the
+# device; decoding stops at the bottom edge of the screen.
+def _runs(device, img, row, col, cols, key):
+    w = img.width()
+    four = img.bits() == 4
+    ymax = min(img.height(), device.height - row)  # Clip at bottom
+    hline = device.hline
+    x = 0
+    y = 0
+    src = _chunks(img)
+    for data in src:
+        step = 1 if four else 2
+        for i in range(0, len(data), step):
+            if four:
+                v = data[i]
+                n = (v >> 4) + 1
+                idx = v & 0x0f
+            else:
+                n = data[i] + 1
+                idx = data[i + 1]
+            if idx == key:  # Transparent: skip the run
+                x += n
+                y += x // w
+                x %= w
+            else:
+                c = cols[idx]
+                while n:
+                    if x == 0 and n >= w:  # Whole rows
+                        nr = n // w
+                        device.fill_rect(col, row + y, w, nr, c)
+                        y += nr
+                        n -= nr * w
+                    else:
+                        m = min(n, w - x)
+                        hline(col + x, row + y, m, c)
+                        x += m
+                        n -= m
+                        if x == w:
+                            x = 0
+                            y += 1
+            if y >= ymax:
+                if not isinstance(src, tuple):
+                    src.close()  # Close the file
+                return
+
+# Draw an image with its top left hand corner at row, col. The image may be a
+# Python image module or an ImageFile. palette: optional list of device colors
+# overriding the image's own palette. Pixels with palette index key are not
+# drawn (transparency); by default the key stored with the image is used.
+# The image is clipped to the screen.
+def draw(device, img, row, col, palette=None, key=None):
+    cols = _colors(device, img.palette()) if palette is None else palette
+    if key is None:
+        key = img.key()
+    if hasattr(device, 'record'):  # Banded display: one operation per image
+        device.record(_render, col, row, col + img.width() - 1, row + img.height() - 1,
+                      (img, row, col, array('H', cols), key), key < 0)
+        return
+    mode = getattr(device, 'mode', None)
+    buf = getattr(device, 'buffer', None)
+    if mode in _FORMATS and buf is not None:
+        fmt = _FORMATS[mode]
+        if len(buf) >= _size(fmt, _stride(fmt, device.width), device.height):
+            _render(buf, mode, device.width, device.height, 0, img, row, col, array('H', cols), key)
+            return
+    _runs(device, img, row, col, cols, key)
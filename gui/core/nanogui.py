@@ -9,7 +9,9 @@
 # Has position, colors and border definition.
 # border: False no border None use bgcolor, int: treat as color
 
-from gui.core.writer import Writer
+from gui.core.writer import Writer, get_state
+from gui.core.colormap import colormap
+from gui.core.arena import buffer
 import framebuf
 import gc
 
@@ -55,39 +57,113 @@ def fillcircle(dev, x0, y0, r, color): # Draw filled circle
             x += 1
             err += x*2 +1
 
+# Bytes needed for a buffer in a given framebuf format
+def _bufsize(mode, width, height):
+    if mode == framebuf.MONO_VLSB:
+        return width * ((height + 7) // 8)
+    if mode == framebuf.RGB565:
+        return width * height * 2
+    if mode == framebuf.GS8:
+        return width * height
+    if mode == framebuf.GS4_HMSB:
+        return ((width + 1) // 2) * height
+    if mode == framebuf.GS2_HMSB:
+        return ((width + 3) // 4) * height
+    return ((width + 7) // 8) * height  # MONO_HLSB, MONO_HMSB
+
+# An off-screen FrameBuffer. Like a device it has height, width and mode, so a
+# Writer can render text to it.
+class Offscreen(framebuf.FrameBuffer):
+    def __init__(self, width, height, mode):
+        self.width = width
+        self.height = height
+        self.mode = mode
+        gc.collect()
+        self.buffer = buffer(_bufsize(mode, width, height), 'offscreen')
+        super().__init__(self.buffer, width, height, mode)
+
+# A FrameBuffer over a window of an existing buffer, e.g. part of an
+# Offscreen. It records its size, which bounds a blit to a banded display.
+class Window(framebuf.FrameBuffer):
+    def __init__(self, buf, width, height, mode, stride):
+        self.width = width
+        self.height = height
+        self.mode = mode
+        super().__init__(buf, width, height, mode, stride)
+
+# Create an Offscreen in the native format of a device. Mono drivers need not
+# declare a mode: any mono format accepts blits from them.
+def offscreen(device, width, height):
+    return Offscreen(width, height, getattr(device, 'mode', framebuf.MONO_HLSB))
+
+# In deferred mode widget updates only mark the widget as pending. Each pending
+# widget is drawn once, in order of creation, by the next refresh.
+def defer(value=True):
+    DObject.deferred = value
+
 # If a (framebuf based) device is passed to refresh, the screen is cleared.
 # None causes pending widgets to be drawn and the result to be copied to hardware.
 # The pend mechanism enables a displayable object to postpone its renedering
 # until it is complete: efficient for e.g. Dial which may have multiple Pointers
 def refresh(device, clear=False):
+    prepare(device, clear)
+    device.show()
+
+# As refresh but the buffer is not copied to hardware. For use by schedulers
+# which perform the copy themselves.
+def prepare(device, clear=False):
     if not isinstance(device, framebuf.FrameBuffer):
         raise ValueError('Device must be derived from FrameBuffer.')
-    if device not in DObject.devices:
-        DObject.devices[device] = set()
+    ds = get_state(device)
+    if ds.pend is None:
+        ds.pend = set()
         device.fill(0)
+        ds.epoch += 1
     else:
         if clear:
-            DObject.devices[device].clear()  # Clear the pending set
+            _take(ds)  # Clear the pending set
             device.fill(0)
+            ds.epoch += 1  # Objects must redraw even if unchanged
         else:
-            for obj in DObject.devices[device]:
+            for obj in _take(ds):
                 obj.show()
-            DObject.devices[device].clear()
-    device.show()
+
+# Empty a device's pending set, returning its contents in drawing order. Objects
+# may be pended by other threads so the lock must be held.
+def _take(ds):
+    if not ds.pend:  # Nothing to draw: avoid allocating in refresh()
+        return ()
+    if ds.lock is None:
+        objs = sorted(ds.pend, key=lambda obj: obj.zorder)
+        ds.pend.clear()
+    else:
+        with ds.lock:
+            objs = sorted(ds.pend, key=lambda obj: obj.zorder)
+            ds.pend.clear()
+    return objs
 
 # Displayable object: effectively an ABC for all GUI objects.
 class DObject():
-    devices = {}  # Index device instance, value is a set of pending objects
+    deferred = False  # Defer drawing until refresh
+    zcount = 0  # Objects are drawn in order of creation
 
     @classmethod
     def _set_pend(cls, obj):
-        cls.devices[obj.device].add(obj)
+        ds = obj.dstate
+        if ds.lock is None:
+            ds.pend.add(obj)
+        else:
+            with ds.lock:
+                ds.pend.add(obj)
+        if ds.notify is not None:
+            ds.notify()
 
     def __init__(self, writer, row, col, height, width, fgcolor, bgcolor, bdcolor):
         writer.set_clip(True, True, False)  # Disable scrolling text
         self.writer = writer
         device = writer.device
         self.device = device
+        self.dstate = writer.dstate  # Per-device render context
         # The following assumes that the widget is mal-positioned, not oversize.
         if row < 0:
             row = 0
@@ -106,13 +182,10 @@ class DObject():
         self.width = width
         self.height = height
         self._value = None  # Type depends on context but None means don't display.
-        # Current colors
-        if fgcolor is None:
-            fgcolor = writer.fgcolor
-        if bgcolor is None:
-            bgcolor = writer.bgcolor
-        if bdcolor is None:
-            bdcolor = fgcolor
+        # Current colors. May be passed as (r, g, b) tuples.
+        fgcolor = writer.fgcolor if fgcolor is None else self._native(fgcolor)
+        bgcolor = writer.bgcolor if bgcolor is None else self._native(bgcolor)
+        bdcolor = fgcolor if bdcolor is None else self._native(bdcolor)
         self.fgcolor = fgcolor
         self.bgcolor = bgcolor
         # bdcolor is False if no border is to be drawn
@@ -123,6 +196,39 @@ class DObject():
         self.def_bdcolor = bdcolor
         # has_border is True if a border was drawn
         self.has_border = False
+        self._drawn = None  # Fingerprint of state when last drawn
+        self.zorder = DObject.zcount
+        DObject.zcount += 1
+
+    # Convert an (r, g, b) tuple to the device's native color. Other values
+    # (native colors, None, False) are returned unchanged.
+    def _native(self, c):
+        return colormap(self.device).native(c) if isinstance(c, tuple) else c
+
+    # Cheap summary of everything affecting the object's appearance.
+    # Subclasses with further visible state should extend the tuple.
+    def _fingerprint(self):
+        return (self._value, self.fgcolor, self.bgcolor, self.bdcolor, self.dstate.epoch)
+
+    # Return True if the object needs redrawing because its visible state has
+    # changed since it was last drawn, or because force is set.
+    def _changed(self, force=False):
+        fp = self._fingerprint()
+        if force or fp != self._drawn:
+            self._drawn = fp
+            return True
+        return False
+
+    # Called when the object's state has been updated. Draw it now, or in
+    # deferred mode at the next refresh.
+    def _update(self, force=False):
+        if self._changed(force):
+            if DObject.deferred:
+                self._set_pend(self)
+            else:
+                self.show()
+                if self.dstate.notify is not None:
+                    self.dstate.notify()
 
     def warning(self):
         print('Warning: attempt to create {} outside screen dimensions.'.format(self.__class__.__name__))
@@ -146,8 +252,8 @@ class DObject():
             self._value = v
         return self._value
 
-    def text(self, text=None, invert=False, fgcolor=None, bgcolor=None, bdcolor=None):
+    def text(self, text=None, invert=False, fgcolor=None, bgcolor=None, bdcolor=None, force=False):
         if hasattr(self, 'label'):
-            self.label.value(text, invert, fgcolor, bgcolor, bdcolor)
+            self.label.value(text, invert, fgcolor, bgcolor, bdcolor, force)
         else:
             raise ValueError('Attempt to update nonexistent label.')
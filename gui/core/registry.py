@@ -0,0 +1,80 @@
+# registry.py Import fonts and widgets on first use
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# Importing every font and widget at startup costs time and RAM: unless frozen
+# a font's data is held on the heap. Fonts and widgets are instead named here
+# and imported when first requested. A font not needed by the current screen
+# may be unloaded: its RAM is reclaimed once no Writer refers to it.
+# Usage:
+# from gui.core.registry import font, widget, unload
+# wri = CWriter(ssd, font('arial10'), GREEN, BLACK)
+# Label = widget('Label')
+# unload('arial10')  # Discard all other fonts
+
+import gc
+import sys
+
+# Font names map onto modules in gui/fonts. Others may be added with
+# add_font(), e.g. add_font('big', 'myfonts.arial50').
+_fonts = {}  # Name: module path
+_loaded = {}  # Name: module
+
+# Widget and graph classes with the module defining each.
+_widgets = {'Label': 'gui.widgets.label',
+            'LED': 'gui.widgets.led',
+            'Meter': 'gui.widgets.meter',
+            'Dial': 'gui.widgets.dial',
+            'Pointer': 'gui.widgets.dial',
+            'Scale': 'gui.widgets.scale',
+            'Textbox': 'gui.widgets.textbox',
+            'CartesianGraph': 'gui.core.fplot',
+            'PolarGraph': 'gui.core.fplot',
+            'Curve': 'gui.core.fplot',
+            'MinMaxCurve': 'gui.core.fplot',
+            'PolarCurve': 'gui.core.fplot',
+            'TSequence': 'gui.core.fplot',
+           }
+
+def _import(path):
+    mod = __import__(path)
+    for name in path.split('.')[1:]:
+        mod = getattr(mod, name)
+    return mod
+
+def add_font(name, path):
+    _fonts[name] = path
+
+def add_widget(name, path):
+    _widgets[name] = path
+
+# Return a font module, importing it if necessary.
+def font(name):
+    if name not in _loaded:
+        _loaded[name] = _import(_fonts.get(name, 'gui.fonts.' + name))
+    return _loaded[name]
+
+# Return a widget class, importing its module if necessary.
+def widget(name):
+    try:
+        path = _widgets[name]
+    except KeyError:
+        raise ValueError('Unknown widget {}'.format(name))
+    return getattr(_import(path), name)
+
+# Discard loaded fonts other than those named. A font's RAM is only reclaimed
+# when no Writer (or other object) refers to it.
+def unload(*keep):
+    for name in [n for n in _loaded if n not in keep]:
+        path = _fonts.get(name, 'gui.fonts.' + name)
+        del _loaded[name]
+        sys.modules.pop(path, None)
+        if '.' in path:  # Remove the reference held by the package
+            pkg, mod = path.rsplit('.', 1)
+            if pkg in sys.modules:
+                try:
+                    delattr(sys.modules[pkg], mod)
+                except AttributeError:
+                    pass
+    gc.collect()
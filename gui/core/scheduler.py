@@ -0,0 +1,152 @@
+# scheduler.py Refresh scheduling under uasyncio
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# Usage:
+# from gui.core.scheduler import Scheduler
+# sched = Scheduler()
+# sched.add(ssd0, fps=20)
+# sched.add(ssd1, fps=5)
+# sched.start()
+
+# Scheduler: each SPI bus is served by its own task. Where several displays share a bus
+# their frames are transferred in segments, round-robin, so that no display
+# waits for the whole of another's frame. Drivers which provide a show_iter
+# generator are transferred in segments; others by a single call to show().
+
+# A segment is transferred while holding the SPI bus lock (see drivers/bus.py)
+# so that other tasks may safely share the bus with the display.
+
+# RefreshService: widgets on a display request a refresh when updated. Requests
+# are coalesced so that the display is refreshed at most at a target rate.
+# rs = RefreshService(ssd, fps=10)
+
+import uasyncio as asyncio
+from utime import ticks_ms, ticks_us, ticks_diff, ticks_add
+from gui.core.nanogui import refresh, prepare
+from gui.core.writer import get_state
+from drivers.bus import SPIBus, get_bus
+
+# Return the SPIBus used by a device, or None (e.g. an I2C device).
+def _bus(device):
+    spi = getattr(device, 'spi', getattr(device, '_spi', None))
+    return None if spi is None else get_bus(spi)
+
+
+class Scheduler():
+    def __init__(self, split=4):
+        self.split = split  # Segments per frame
+        self.buses = {}  # Index bus, value list of [device, period, due]
+        self.tasks = []
+
+    # bus is the bus (e.g. SPI instance or SPIBus) used by the device. By
+    # default the driver's spi attribute is used.
+    def add(self, device, fps=10, bus=None):
+        if bus is None:
+            bus = _bus(device)
+            if bus is None:  # Not an SPI device
+                bus = device
+        else:
+            bus = get_bus(bus)
+        if bus not in self.buses:
+            self.buses[bus] = []
+        self.buses[bus].append([device, 1000 // fps, ticks_ms()])
+
+    def start(self):
+        for bus, devs in self.buses.items():
+            lock = bus.lock if isinstance(bus, SPIBus) else None
+            self.tasks.append(asyncio.create_task(self._run(devs, lock)))
+
+    def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+    def _frame(self, device):
+        prepare(device)  # Draw any pending objects
+        if hasattr(device, 'show_iter'):
+            yield from device.show_iter(self.split)
+        else:
+            device.show()
+            yield
+
+    async def _run(self, devs, lock):
+        frames = []
+        while True:
+            now = ticks_ms()
+            for d in devs:  # Start a frame on each device which is due
+                if ticks_diff(now, d[2]) >= 0:
+                    d[2] = ticks_add(d[2], d[1])
+                    if ticks_diff(now, d[2]) >= 0:  # Overrun: don't try to catch up
+                        d[2] = ticks_add(now, d[1])
+                    frames.append(self._frame(d[0]))
+            while frames:  # Round robin a segment from each frame
+                n = 0
+                while n < len(frames):
+                    if lock is not None:
+                        await lock.acquire()
+                    try:
+                        next(frames[n])
+                        n += 1
+                    except StopIteration:
+                        frames.pop(n)
+                    finally:
+                        if lock is not None:
+                            lock.release()
+                    await asyncio.sleep_ms(0)
+            now = ticks_ms()
+            t = min(ticks_diff(d[2], now) for d in devs)
+            await asyncio.sleep_ms(max(t, 0))
+
+
+class RefreshService():
+    # fps: maximum refresh rate. latency: maximum ms between a request and the
+    # start of a refresh. duty: maximum fraction of time spent refreshing.
+    def __init__(self, device, fps=10, latency=200, duty=0.5):
+        self.device = device
+        bus = _bus(device)
+        self._lock = None if bus is None else bus.lock
+        self.period = 1000 // fps
+        self.latency = latency
+        self.duty = duty
+        self.tshow = 0  # Measured duration of a refresh (ms, filtered)
+        self.nreq = 0  # Requests since last refresh
+        self.nref = 0  # Refreshes performed
+        self._evt = asyncio.Event()
+        self._tlast = ticks_ms()  # Start time of last refresh
+        get_state(device).notify = self.request  # Widget updates request refresh
+        self.task = asyncio.create_task(self._run())
+
+    # Signal that the buffer has changed. May be called by user code which
+    # draws directly to the device.
+    def request(self):
+        self.nreq += 1
+        self._evt.set()
+
+    def stop(self):
+        get_state(self.device).notify = None
+        self.task.cancel()
+
+    async def _run(self):
+        while True:
+            await self._evt.wait()
+            # Wait for the end of the current frame period to collect further
+            # requests. Slow displays stretch the period to limit bus occupancy.
+            period = max(self.period, int(self.tshow / self.duty))
+            t = ticks_diff(ticks_add(self._tlast, period), ticks_ms())
+            await asyncio.sleep_ms(max(min(t, self.latency), 0))
+            self._evt.clear()
+            self.nreq = 0
+            self._tlast = ticks_ms()
+            if self._lock is not None:
+                await self._lock.acquire()
+            t = ticks_us()
+            try:
+                refresh(self.device)
+            finally:
+                if self._lock is not None:
+                    self._lock.release()
+            t = ticks_diff(ticks_us(), t) // 1000
+            self.tshow = (self.tshow * 3 + t) // 4 if self.nref else t
+            self.nref += 1
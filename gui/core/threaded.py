@@ -0,0 +1,57 @@
+# threaded.py Transfer the frame buffer to the display in a separate thread
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# Intended for dual core hosts (ESP32, RP2040) where the transfer can run on
+# one core while the application updates widgets on the other.
+# Usage:
+# from gui.core.threaded import FlushThread
+# ft = FlushThread(ssd)
+# ...
+# ft.refresh()  # Replaces nanogui.refresh(ssd)
+
+# Widgets should be used in deferred mode (nanogui.defer()) so that updates
+# only change the pending set, which is protected by a lock. Drawing then
+# takes place in .refresh() which waits for any transfer in progress to
+# complete. Drivers instantiated with double=True copy the buffer before the
+# transfer starts: drawing then overlaps the transfer of the previous frame.
+
+import _thread
+from gui.core.nanogui import prepare
+from gui.core.writer import get_state
+
+
+class FlushThread():
+    def __init__(self, device):
+        self.device = device
+        get_state(device).lock = _thread.allocate_lock()
+        self.double = getattr(device, 'double', False)
+        self._go = _thread.allocate_lock()  # Released to start a transfer
+        self._go.acquire()
+        self._idle = _thread.allocate_lock()  # Held during a transfer
+        _thread.start_new_thread(self._run, ())
+
+    # Draw pending objects and start a transfer. Returns once drawing is
+    # complete, without waiting for the transfer.
+    def refresh(self, clear=False):
+        if self.double:
+            prepare(self.device, clear)  # Draw while the last frame is sent
+            self._idle.acquire()  # Wait for the transfer to complete
+            self.device.snapshot()  # Transfer a copy
+        else:
+            self._idle.acquire()  # Wait for any transfer in progress to complete
+            prepare(self.device, clear)
+        self._go.release()
+
+    # Block until the last transfer is complete.
+    def wait(self):
+        self._idle.acquire()
+        self._idle.release()
+
+    def _run(self):
+        dev = self.device
+        while True:
+            self._go.acquire()
+            dev.show()
+            self._idle.release()
@@ -20,6 +20,7 @@
 
 import framebuf
 from uctypes import bytearray_at, addressof
+from gui.core.arena import buffer
 
 fast_mode = True
 try:
@@ -35,28 +36,40 @@ except ValueError:
     print('Ignoring framebuf_utils.mpy: compiled for incorrect architecture.')
 
 
+# Glyph FrameBuffers for devices which render glyphs: {font: {char: FrameBuffer}}.
+# Holding the font keeps the glyph data valid.
+_pools = {}
+
+# Render context for a device. One instance exists per device: Writers and
+# nanogui objects bind to it on creation so the hot path needs no lookup.
 class DisplayState():
     def __init__(self):
         self.text_row = 0
         self.text_col = 0
         self.usd = False
-
-def _get_id(device):
-    if not isinstance(device, framebuf.FrameBuffer):
-        raise ValueError('Device must be derived from FrameBuffer.')
-    return id(device)
+        self.pend = None  # Set of pending nanogui objects. None: not yet refreshed.
+        self.epoch = 0  # Incremented when the display is cleared
+        self.notify = None  # Optional callback run when an object is updated
+        self.lock = None  # Lock protecting pend when used with _thread
+        self.cmap = None  # ColorMap: see colormap.py
+
+# Return the render context for a device, creating it if necessary. It is held
+# by the device so it is freed with it.
+def get_state(device):
+    try:
+        return device._gui_state
+    except AttributeError:
+        if not isinstance(device, framebuf.FrameBuffer):
+            raise ValueError('Device must be derived from FrameBuffer.')
+        device._gui_state = DisplayState()
+        return device._gui_state
 
 # Basic Writer class for monochrome displays
 class Writer():
 
-    state = {}  # Holds a display state for each device
-
     @staticmethod
     def set_textpos(device, row=None, col=None):
-        devid = _get_id(device)
-        if devid not in Writer.state:
-            Writer.state[devid] = DisplayState()
-        s = Writer.state[devid]  # Current state
+        s = get_state(device)  # Current state
         if row is not None:
             if row < 0 or row >= device.height:
                 raise ValueError('row is out of range')
@@ -68,12 +81,10 @@ class Writer():
         return s.text_row,  s.text_col
 
     def __init__(self, device, font, verbose=True):
-        self.devid = _get_id(device)
         self.device = device
-        if self.devid not in Writer.state:
-            Writer.state[self.devid] = DisplayState()
+        self.dstate = get_state(device)
         self.font = font
-        self.usd = Writer.state[self.devid].usd
+        self.usd = self.dstate.usd
 
         # Allow to work with reverse or normal font mapping
         if font.hmap():
@@ -83,12 +94,14 @@ class Writer():
         if verbose:
             fstr = 'Orientation: Horizontal. Reversal: {}. Width: {}. Height: {}.'
             print(fstr.format(font.reverse(), device.width, device.height))
-            print('Start row = {} col = {}'.format(self._getstate().text_row, self._getstate().text_col))
+            print('Start row = {} col = {}'.format(self.dstate.text_row, self.dstate.text_col))
         self.screenwidth = device.width  # In pixels
         self.screenheight = device.height
         self.bgcolor = 0  # Monochrome background and foreground colors
         self.fgcolor = 1
-        self.row_clip = False  # Clip or scroll when screen full
+        # Clip or scroll when screen full. A display which cannot be read back
+        # (banded) cannot scroll.
+        self.row_clip = not getattr(device, 'readable', True)
         self.col_clip = False  # Clip or new line when row is full
         self.wrap = True  # Word wrap
         self.cpos = 0
@@ -97,12 +110,13 @@ class Writer():
         self.glyph = None  # Current char
         self.char_height = 0
         self.char_width = 0
-
-    def _getstate(self):
-        return Writer.state[self.devid]
+        self._gbuf = None  # Glyph scratch buffer: allocated on first use
+        if hasattr(device, 'glyph'):  # Device renders glyphs
+            self._pool = _pools.setdefault(font, {})
+            self._printchar = self._pchdev
 
     def _newline(self):
-        s = self._getstate()
+        s = self.dstate
         height = self.font.height()
         if self.usd:
             s.text_row -= height
@@ -124,6 +138,8 @@ class Writer():
 
     def set_clip(self, row_clip=None, col_clip=None, wrap=None):
         if row_clip is not None:
+            if not (row_clip or getattr(self.device, 'readable', True)):
+                raise ValueError('Display cannot scroll: row_clip must be True.')
             self.row_clip = row_clip
         if col_clip is not None:
             self.col_clip = col_clip
@@ -198,7 +214,7 @@ class Writer():
             self._newline()
             return
         glyph, char_height, char_width = self.font.get_ch(char)
-        s = self._getstate()
+        s = self.dstate
         if self.usd:
             if s.text_row - char_height < 0:
                 if self.row_clip:
@@ -226,19 +242,44 @@ class Writer():
     # Method using blitting. Efficient rendering for monochrome displays.
     # Tested on SSD1306. Invert is for black-on-white rendering.
     def _printchar(self, char, invert=False, recurse=False):
-        s = self._getstate()
+        s = self.dstate
         self._get_char(char, recurse)
         if self.glyph is None:
             return  # All done
-        buf = bytearray(self.glyph)
+        if self._gbuf is None:  # Large enough for any glyph in the font
+            font = self.font
+            self._gbuf = buffer(((font.max_width() + 7) // 8) * font.height(), 'glyph')
+        buf = self._gbuf
+        n = len(self.glyph)
+        buf[0 : n] = self.glyph
         if invert:
-            for i, v in enumerate(buf):
-                buf[i] = 0xFF & ~ v
+            for i in range(n):
+                buf[i] = 0xFF & ~ buf[i]
         fbc = framebuf.FrameBuffer(buf, self.char_width, self.char_height, self.map)
         self.device.blit(fbc, s.text_col, s.text_row)
         s.text_col += self.char_width
         self.cpos += 1
 
+    # The device records or renders the glyph itself. A glyph's FrameBuffer is
+    # created once and kept in the pool of its font, so a recorded glyph
+    # remains valid.
+    def _pchdev(self, char, invert=False, recurse=False):
+        s = self.dstate
+        self._get_char(char, recurse)
+        if self.glyph is None:
+            return  # All done
+        try:
+            fbc = self._pool[char]
+        except KeyError:
+            buf = bytearray_at(addressof(self.glyph), len(self.glyph))
+            fbc = framebuf.FrameBuffer(buf, self.char_width, self.char_height, self.map)
+            self._pool[char] = fbc
+        fgcolor = self.bgcolor if invert else self.fgcolor
+        bgcolor = self.fgcolor if invert else self.bgcolor
+        self.device.glyph(fbc, s.text_col, s.text_row, self.char_width, self.char_height, fgcolor, bgcolor)
+        s.text_col += self.char_width
+        self.cpos += 1
+
     def tabsize(self, value=None):
         if value is not None:
             self.tab = value
@@ -252,25 +293,25 @@ class CWriter(Writer):
 
     @staticmethod
     def invert_display(device, value=True):
-        devid = id(device)
-        if devid not in Writer.state:
-            Writer.state[devid] = DisplayState()
-        Writer.state[devid].usd = value
+        get_state(device).usd = value
 
     def __init__(self, device, font, fgcolor=None, bgcolor=None, verbose=True):
         super().__init__(device, font, verbose)
         if bgcolor is not None:  # Assume monochrome.
-            self.bgcolor = bgcolor
+            self.bgcolor = self._native(bgcolor)
         if fgcolor is not None:
-            self.fgcolor = fgcolor
+            self.fgcolor = self._native(fgcolor)
         self.def_bgcolor = self.bgcolor
         self.def_fgcolor = self.fgcolor
         fm = fast_mode and not self.usd
         self._printchar = self._pchfast if fm else self._pchslow
+        if hasattr(device, 'glyph') and not self.usd:  # Device renders glyphs
+            fm = True
+            self._printchar = self._pchdev
         verbose and print('Render {} using fast mode'.format('is' if fm else 'not'))
 
     def _pchfast(self, char, invert=False, recurse=False):
-        s = self._getstate()
+        s = self.dstate
         self._get_char(char, recurse)
         if self.glyph is None:
             return  # All done
@@ -283,7 +324,7 @@ class CWriter(Writer):
         self.cpos += 1
 
     def _pchslow(self, char, invert=False, recurse=False):
-        s = self._getstate()
+        s = self.dstate
         self._get_char(char, recurse)
         if self.glyph is None:
             return  # All done
@@ -322,7 +363,15 @@ class CWriter(Writer):
             self.bgcolor = self.def_bgcolor
         else:
             if fgcolor is not None:
-                self.fgcolor = fgcolor
+                self.fgcolor = self._native(fgcolor)
             if bgcolor is not None:
-                self.bgcolor = bgcolor
+                self.bgcolor = self._native(bgcolor)
         return self.fgcolor, self.bgcolor
+
+    # Colors may be passed as (r, g, b) tuples. colormap imports this module
+    # so is imported on first use.
+    def _native(self, c):
+        if isinstance(c, tuple):
+            from gui.core.colormap import colormap
+            return colormap(self.device).native(c)
+        return c
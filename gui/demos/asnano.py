@@ -14,6 +14,7 @@ import pyb
 import uos
 from gui.core.writer import CWriter
 from gui.core.nanogui import refresh
+from gui.core.scheduler import RefreshService
 from gui.widgets.led import LED
 from gui.widgets.meter import Meter
 
@@ -42,8 +43,7 @@ async def meter(n, x, text, t):
         m.value(v, color(v))
         l.color(color(v))
         l.text(txt(v), fgcolor=color(v))
-        refresh(ssd)
-        await asyncio.sleep_ms(t)
+        await asyncio.sleep_ms(t)  # RefreshService updates the display
 
 async def flash(n, t):
     led = pyb.LED(n)
@@ -51,21 +51,23 @@ async def flash(n, t):
         led.toggle()
         await asyncio.sleep_ms(t)
 
-async def killer(tasks):
+async def killer(rs, tasks):
     sw = pyb.Switch()
     while not sw():
         await asyncio.sleep_ms(100)
+    rs.stop()  # Also detaches the service from the display
     for task in tasks:
         task.cancel()
 
 async def main():
+    rs = RefreshService(ssd, fps=5)  # Coalesce updates from all meters
     tasks = []
     tasks.append(asyncio.create_task(meter(1, 2, 'left', 700)))
     tasks.append(asyncio.create_task(meter(2, 50, 'right', 1000)))
     tasks.append(asyncio.create_task(meter(3, 98, 'bass', 1500)))
     tasks.append(asyncio.create_task(flash(1, 200)))
     tasks.append(asyncio.create_task(flash(2, 233)))
-    await killer(tasks)
+    await killer(rs, tasks)
 
 print('Press Pyboard usr button to stop test.')
 try:
@@ -142,7 +142,8 @@ def liss():
 def seq():
     print('Time sequence test - sine and cosine.')
     refresh(ssd, True)  # Clear any prior image
-    # y axis at t==now, no border
+    # y axis at t==now, no border. Pass cache=True to copy the background off
+    # screen so that g.clear() blits it rather than redrawing the grid.
     g = CartesianGraph(wri, 2, 2, xorigin = 10, fgcolor=WHITE,
                        gridcolor=LIGHTGREEN, bdcolor=False)
     tsy = TSequence(g, YELLOW, 50)
@@ -0,0 +1,59 @@
+# startup.py Benchmark: startup time and RAM use with and without the registry
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# Imports the fonts and widgets used by the demos, either directly or via
+# gui.core.registry, and reports the time and RAM taken by the imports alone.
+# Both paths load the same modules. Modules remain imported after a run, so
+# perform a soft reset (ctrl-D) before each test.
+# Usage:
+# import gui.demos.startup as s; s.test(False)  # Direct imports
+# import gui.demos.startup as s; s.test(True)  # Use the registry
+
+# Initialise hardware and framebuf before importing modules.
+from color_setup import ssd  # Create a display instance
+import gc
+import utime
+
+_FONTS = ('arial10', 'courier20', 'font6', 'freesans20')
+_WIDGETS = ('Label', 'LED', 'Meter', 'Dial', 'Pointer', 'Scale', 'Textbox')
+
+def _eager():
+    import gui.fonts.arial10
+    import gui.fonts.courier20
+    import gui.fonts.font6
+    import gui.fonts.freesans20
+    import gui.widgets.label
+    import gui.widgets.led
+    import gui.widgets.meter
+    import gui.widgets.dial
+    import gui.widgets.scale
+    import gui.widgets.textbox
+    return gui.fonts.arial10, gui.widgets.label.Label
+
+def _lazy():
+    from gui.core.registry import font, widget
+    for name in _FONTS:
+        font(name)
+    for name in _WIDGETS:
+        widget(name)
+    return font('arial10'), widget('Label')
+
+def test(lazy=True):
+    gc.collect()
+    m0 = gc.mem_alloc()
+    t = utime.ticks_us()
+    fnt, Label = _lazy() if lazy else _eager()
+    t = utime.ticks_diff(utime.ticks_us(), t)
+    m1 = gc.mem_alloc()  # Includes garbage: approximates the peak
+    gc.collect()
+    m2 = gc.mem_alloc()
+    print('{} imports took {}ms.'.format('Registry' if lazy else 'Direct', t // 1000))
+    print('RAM allocated {} bytes, {} retained. Free {} bytes.'.format(m1 - m0, m2 - m0, gc.mem_free()))
+    from gui.core.writer import CWriter  # Show that the imports work
+    from gui.core.nanogui import refresh
+    from gui.core.colors import GREEN, BLACK
+    wri = CWriter(ssd, fnt, GREEN, BLACK, verbose=False)
+    Label(wri, 2, 2, 'Startup')
+    refresh(ssd)
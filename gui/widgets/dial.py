@@ -42,7 +42,7 @@ class Pointer():
         self.color = None
 
     def value(self, v=None, color=None):
-        self.color = color
+        self.color = self.dial._native(color)
         if v is not None:
             if isinstance(v, complex):
                 l = cmath.polar(v)[0]
@@ -64,7 +64,7 @@ class Dial(DObject):
                  label=None, style=0, pip=None):
         super().__init__(writer, row, col, height, height, fgcolor, bgcolor, bdcolor)
         self.style = style
-        self.pip = self.fgcolor if pip is None else pip
+        self.pip = self.fgcolor if pip is None else self._native(pip)
         if label is not None:
             self.label = Label(writer, row + height + 3, col, label)
         radius = int(height / 2)
@@ -95,7 +95,7 @@ class Dial(DObject):
         vshort = 1000  # Length of shortest vector
         for v in self.vectors:
             color = self.fgcolor if v.color is None else v.color
-            val = v.value() * radius  # val is complex
+            val = v.val * radius  # val is complex. Reading v.value() would pend.
             vshort = min(vshort, cmath.polar(val)[0])
             if self.style == Dial.CLOCK:
                 polar(dev, vor, val, color)
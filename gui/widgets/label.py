@@ -20,18 +20,21 @@ class Label(DObject):
         if text is not None:
             self.value(text, invert)
 
-    def value(self, text=None, invert=False, fgcolor=None, bgcolor=None, bdcolor=None):
+    def value(self, text=None, invert=False, fgcolor=None, bgcolor=None, bdcolor=None, force=False):
         txt = super().value(text)
-        # Redraw even if no text supplied: colors may have changed.
+        # Colors may have changed even if no text supplied.
         self.invert = invert
-        self.fgcolor = self.def_fgcolor if fgcolor is None else fgcolor
-        self.bgcolor = self.def_bgcolor if bgcolor is None else bgcolor
+        self.fgcolor = self.def_fgcolor if fgcolor is None else self._native(fgcolor)
+        self.bgcolor = self.def_bgcolor if bgcolor is None else self._native(bgcolor)
         if bdcolor is False:
             self.def_bdcolor = False
-        self.bdcolor = self.def_bdcolor if bdcolor is None else bdcolor
-        self.show()
+        self.bdcolor = self.def_bdcolor if bdcolor is None else self._native(bdcolor)
+        self._update(force)  # Skip if nothing visible has changed
         return txt
 
+    def _fingerprint(self):
+        return super()._fingerprint() + (self.invert,)
+
     def show(self):
         txt = super().value()
         if txt is None:  # No content to draw. Future use.
@@ -14,9 +14,9 @@ class LED(DObject):
             self.label = Label(writer, row + height + 3, col, label)
         self.radius = self.height // 2
 
-    def color(self, c=None):
-        self.fgcolor = self.bgcolor if c is None else c
-        self.show()
+    def color(self, c=None, force=False):
+        self.fgcolor = self.bgcolor if c is None else self._native(c)
+        self._update(force)
 
     def show(self):
         super().show()
@@ -16,48 +16,83 @@ class Meter(DObject):
         super().__init__(writer, row, col, height, width, fgcolor, bgcolor, bdcolor)
         self.divisions = divisions
         if label is not None:
-            Label(writer, row + height + 3, col, label)
+            self.label = Label(writer, row + height + 3, col, label)
         self.style = style
         self.legends = legends
-        self.ptcolor = ptcolor if ptcolor is not None else self.fgcolor
+        row = self.row  # May have been adjusted by DObject
+        col = self.col
+        # Legends are static: create their Labels once. These draw themselves.
+        self.llabels = []
+        if legends is not None:
+            dy = 0 if len(legends) <= 1 else height / (len(legends) -1)
+            yl = row + height - writer.height / 2 # Start at bottom
+            for legend in legends:
+                self.llabels.append(Label(writer, int(yl), col + width + 4, legend))
+                yl -= dy
+        self._sepoch = self.dstate.epoch  # Epoch when static parts were drawn
+        self.ticks = []  # Y positions of tick marks
+        if divisions > 0:
+            dy = height / divisions
+            for tick in range(divisions + 1):
+                self.ticks.append(int(row + dy * tick))
+        self._y = None  # Y position of pointer or top of bar when last drawn
+        self._dstate = None  # Other drawn state: delta drawing requires no change
+        self.ptcolor = self._native(ptcolor) if ptcolor is not None else self.fgcolor
         self.value(value)
 
-    def value(self, n=None, color=None):
+    def value(self, n=None, color=None, force=False):
         if n is None:
             return super().value()
         n = super().value(min(1, max(0, n)))
         if color is not None:
-            self.ptcolor = color
-        self.show()
+            self.ptcolor = self._native(color)
+        if force:
+            self._y = None  # Full redraw
+        self._update(force)
         return n
+
+    def _fingerprint(self):
+        return super()._fingerprint() + (self.ptcolor,)
         
+    # If only the value has changed since the last draw, draw just the strip
+    # between the old and new positions. Otherwise redraw everything.
     def show(self):
-        super().show()  # Draw or erase border
         val = super().value()
-        wri = self.writer
         dev = self.device
         width = self.width
-        height = self.height
-        legends = self.legends
         x0 = self.col
-        x1 = self.col + width
-        y0 = self.row
-        y1 = self.row + height
-        if self.divisions > 0:
-            dy = height / (self.divisions) # Tick marks
-            for tick in range(self.divisions + 1):
-                ypos = int(y0 + dy * tick)
-                dev.hline(x0 + 2, ypos, x1 - x0 - 4, self.fgcolor)
-
-        if legends is not None: # Legends
-            dy = 0 if len(legends) <= 1 else height / (len(legends) -1)
-            yl = y1 - wri.height / 2 # Start at bottom
-            for legend in legends:
-                Label(wri, int(yl), x1 + 4, legend)
-                yl -= dy
-        y = int(y1 - val * height) # y position of slider
-        if self.style == self.LINE:
-            dev.hline(x0, y, width, self.ptcolor) # Draw pointer
+        y1 = self.row + self.height
+        y = int(y1 - val * self.height) # y position of slider
+        oy = self._y
+        dstate = self._fingerprint()[1:]  # All but value, including ptcolor
+        if oy is None or dstate != self._dstate:
+            super().show()  # Draw or erase border
+            for ypos in self.ticks:  # Tick marks
+                dev.hline(x0 + 2, ypos, width - 4, self.fgcolor)
+            if self._sepoch != self.dstate.epoch:  # Display was cleared: redraw labels
+                for label in self.llabels:
+                    label.show()
+                if hasattr(self, 'label'):
+                    self.label.show()
+                self._sepoch = self.dstate.epoch
+            if self.style == self.LINE:
+                dev.hline(x0, y, width, self.ptcolor) # Draw pointer
+            else:
+                dev.fill_rect(int(x0 + width / 2 - 2), y, 4, y1 - y, self.ptcolor)
+        elif self.style == self.LINE:
+            if y != oy:
+                dev.hline(x0, oy, width, self.bgcolor) # Erase old pointer
+                if oy in self.ticks:
+                    dev.hline(x0 + 2, oy, width - 4, self.fgcolor)
+                dev.hline(x0, y, width, self.ptcolor)
         else:
-            w = width / 2
-            dev.fill_rect(int(x0 + w - 2), y, 4, y1 - y, self.ptcolor)
+            xb = int(x0 + width / 2 - 2)
+            if y < oy:  # Bar has grown
+                dev.fill_rect(xb, y, 4, oy - y, self.ptcolor)
+            elif y > oy:  # Bar has shrunk: erase the strip and restore ticks
+                dev.fill_rect(xb, oy, 4, y - oy, self.bgcolor)
+                for ypos in self.ticks:
+                    if oy <= ypos < y:
+                        dev.hline(x0 + 2, ypos, width - 4, self.fgcolor)
+        self._y = y
+        self._dstate = dstate
@@ -6,15 +6,19 @@
 # Usage:
 # from gui.widgets.scale import Scale
 
-from gui.core.nanogui import DObject
-from gui.core.writer import Writer
+import framebuf
+from gui.core.nanogui import DObject, Window, offscreen
+from gui.core.writer import Writer, CWriter
 from gui.core.colors import BLACK
 
+# Bytes per pixel of device formats which permit windowed blits from a tape
+_BPP = {framebuf.GS8: 1, framebuf.RGB565: 2}
+
 class Scale(DObject):
     def __init__(self, writer, row, col, *,
                  ticks=200, legendcb=None, tickcb=None,
                  height=0, width=100, bdcolor=None, fgcolor=None, bgcolor=None,
-                 pointercolor=None, fontcolor=None):
+                 pointercolor=None, fontcolor=None, cache=False):
         if ticks % 2:
             raise ValueError('ticks arg must be divisible by 2')
         self.ticks = ticks
@@ -33,12 +37,12 @@ class Scale(DObject):
             ctrl_ht = height - min_ht  # adjust ticks for greater height
         width &= 0xfffe  # Make divisible by 2: avoid 1 pixel pointer offset
         super().__init__(writer, row, col, height, width, fgcolor, bgcolor, bdcolor)
-        self.fontcolor = fontcolor if fontcolor is not None else self.fgcolor
+        self.fontcolor = self._native(fontcolor) if fontcolor is not None else self.fgcolor
         self.x0 = col + 2
         self.x1 = col + self.width - 2
         self.y0 = row + 2
         self.y1 = row + self.height - 2
-        self.ptrcolor = pointercolor if pointercolor is not None else self.fgcolor
+        self.ptrcolor = self._native(pointercolor) if pointercolor is not None else self.fgcolor
         # Define tick dimensions
         ytop = self.y0 + text_ht + 2  # Top of scale graphic (2 pixel gap)
         ycl = ytop + (self.y1 - ytop) // 2  # Centre line
@@ -48,6 +52,71 @@ class Scale(DObject):
         self.mdy0 = ycl - self.mdl // 2
         self.ldl = ctrl_ht  # Large tick
         self.ldy0 = ycl - self.ldl // 2
+        # Optional cache: ticks and legends for a tape two windows wide are
+        # rendered off-screen. An update blits the window from it and draws the
+        # pointer, until the value scrolls beyond the ends of the tape.
+        self._tape = None
+        mode = getattr(self.device, 'mode', None)
+        if cache and mode in _BPP:
+            win_width = self.x1 - self.x0
+            self._tape = offscreen(self.device, 2 * win_width + 1, self.y1 - self.y0)
+            self._twri = CWriter(self._tape, writer.font, self.fontcolor, self.bgcolor, verbose=False)
+            self._twri.set_clip(True, True, False)  # Clip legends at the tape end
+            self._bpp = _BPP[mode]
+            self._vstart = None  # Value at left hand end of tape
+
+    # X offset in pixels of a value (0..ticks*10) from the left of the tape.
+    def _xpix(self, v):
+        return (v * (self.x1 - self.x0)) // 200
+
+    def _tick(self, fb, iv, x, y0):
+        if not iv % 10:
+            ys = self.ldy0  # Large tick
+            yl = self.ldl
+        elif not iv % 5:
+            ys = self.mdy0
+            yl = self.mdl
+        else:
+            ys = self.sdy0
+            yl = self.sdl
+        if self.tickcb is None:
+            color = self.fgcolor
+        else:
+            color = self.tickcb(self._fvalue(iv * 10), self.fgcolor)
+        fb.vline(x, ys - y0, yl, color)  # Draw tick
+
+    # Render the tape covering values vstart to vstart + 400 (two windows).
+    # A legend is drawn right of its tick and clipped at the right hand end.
+    def _render(self, vstart):
+        tape = self._tape
+        wri = self._twri
+        tape.fill(self.bgcolor)
+        xs: int = self._xpix(vstart)
+        iv: int = max(0, -(-vstart // 10))  # First tick at or after vstart
+        while iv <= self.ticks:
+            x: int = self._xpix(iv * 10) - xs
+            if x >= tape.width:
+                break
+            if not iv % 10:
+                Writer.set_textpos(tape, 0, x)
+                wri.printstring(self.legendcb(self._fvalue(iv * 10)))
+            self._tick(tape, iv, x, self.y0)
+            iv += 1
+        self._vstart = vstart
+
+    # Blit the window from the tape, re-rendering the tape if necessary.
+    def _blit(self):
+        tape = self._tape
+        val: int = self._value
+        vs = self._vstart
+        if vs is None or val - 100 < vs or val + 100 > vs + 400:
+            vs = val - 200  # Centre window on tape
+            self._render(vs)
+        win_width: int = self.x1 - self.x0
+        offs: int = self._xpix(val - 100) - self._xpix(vs)
+        mv = memoryview(tape.buffer)[offs * self._bpp :]
+        fb = Window(mv, win_width + 1, tape.height, tape.mode, tape.width)
+        self.device.blit(fb, self.x0, self.y0)
 
     def show(self):
         wri = self.writer
@@ -56,6 +125,11 @@ class Scale(DObject):
         x1: int = self.x1
         y0: int = self.y0
         y1: int = self.y1
+        if self._tape is not None:
+            super().show()
+            self._blit()  # Ticks and legends
+            dev.vline(x0 + (x1 - x0) // 2, y0, y1 - y0, self.ptrcolor) # Draw pointer
+            return
         dev.fill_rect(x0, y0, x1 - x0, y1 - y0, self.bgcolor)
         super().show()
         # Scale is drawn using ints. Each division is 10 units.
@@ -78,8 +152,6 @@ class Scale(DObject):
         ticks: int = self.ticks  # Total # of ticks visible and hidden
         while True:
             x: int = x0 + (fx * win_width) // 200  # Current X position
-            ys: int  # Start Y position for tick
-            yl: int  # tick length
             if x > x1 or iv > ticks:  # Out of space or data (scroll left)
                 break
             if not iv % 10:
@@ -89,19 +161,7 @@ class Scale(DObject):
                 wri.setcolor(self.fontcolor, self.bgcolor)
                 wri.printstring(txt)
                 wri.setcolor()
-                ys = self.ldy0  # Large tick
-                yl = self.ldl
-            elif not iv % 5:
-                ys = self.mdy0
-                yl = self.mdl
-            else:
-                ys = self.sdy0
-                yl = self.sdl
-            if self.tickcb is None:
-                color = self.fgcolor
-            else:
-                color = self.tickcb(self._fvalue(iv * 10), self.fgcolor)
-            dev.vline(x, ys, yl, color)  # Draw tick
+            self._tick(dev, iv, x, 0)
             fx += 10
             iv += 1
 
@@ -117,7 +177,6 @@ class Scale(DObject):
         if val is not None:
             val = min(max(val, - 1.0), 1.0)
             v = self._to_int(val)
-            if v != self._value:
-                self._value = v
-                self.show()
+            self._value = v
+            self._update()  # Only if value has changed
         return self._fvalue(self._value)
@@ -107,7 +107,7 @@ class Textbox(DObject):
         s = self.start
         self.start = max(0, min(self.start + n, value - self.nlines))
         if s != self.start:
-            self.show()
+            self._update(True)
             return True
         return False
 
@@ -116,11 +116,11 @@ class Textbox(DObject):
 
     def clear(self):
         self.lines = []
-        self.show()
+        self._update(True)
 
     def goto(self, line=None):  # Absolute scrolling
         if line is None:
             self.start = max(0, len(self.lines) - self.nlines)
         else:
             self.start = max(0, min(line, len(self.lines) - self.nlines))
-        self.show()
+        self._update(True)
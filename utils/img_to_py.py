@@ -0,0 +1,120 @@
+#! /usr/bin/env python3
+# img_to_py.py Convert an image file to a run length encoded image for nano-gui
+
+# Released under the MIT License (MIT). See LICENSE.
+# Copyright (c) 2020 Peter Hinch
+
+# Runs on a PC under CPython 3. Requires Pillow (pip3 install pillow).
+# Output is either a Python module, which may be frozen as bytecode so that the
+# image data stays in flash, or (with -b) a binary file to be loaded from the
+# target's filesystem by gui.core.image.ImageFile.
+# The image is reduced to a palette of at most 256 colors (default 16). Images
+# with 16 colors or fewer use a compact encoding with one byte per run.
+# Fully transparent pixels are mapped to an extra palette entry which is not
+# drawn.
+# Usage:
+# ./img_to_py.py splash.png splash.py
+# ./img_to_py.py -c 4 -b icon.png icon.bin
+
+import argparse
+import struct
+import sys
+import os
+
+_HDR = '<2sHHBBh'  # Must match gui/core/image.py
+_MAGIC = b'RL'
+
+# Return (width, height, palette, pixels, key) where palette is a list of
+# (r, g, b) tuples, pixels a list of palette indices in row-major order and key
+# the index of the transparent color or -1.
+def load(fn, ncolors):
+    from PIL import Image
+    img = Image.open(fn)
+    alpha = None
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        alpha = img.getchannel('A').getdata()
+        if min(alpha) >= 128:  # Nothing to make transparent
+            alpha = None
+    if alpha is not None:
+        ncolors -= 1  # Reserve an index for transparent pixels
+    q = img.convert('RGB').quantize(colors=ncolors)
+    pal = q.getpalette()[: ncolors * 3]
+    palette = [tuple(pal[i : i + 3]) for i in range(0, len(pal), 3)]
+    pixels = list(q.getdata())
+    used = max(pixels) + 1
+    palette = palette[:used]
+    key = -1
+    if alpha is not None:
+        key = used
+        palette.append((0, 0, 0))
+        pixels = [key if a < 128 else p for p, a in zip(pixels, alpha)]
+    return img.width, img.height, palette, pixels, key
+
+# Run length encode a list of palette indices.
+def encode(pixels, bits):
+    maxrun = 16 if bits == 4 else 256
+    out = bytearray()
+    i = 0
+    while i < len(pixels):
+        idx = pixels[i]
+        n = 1
+        while n < maxrun and i + n < len(pixels) and pixels[i + n] == idx:
+            n += 1
+        if bits == 4:
+            out.append(((n - 1) << 4) | idx)
+        else:
+            out.extend((n - 1, idx))
+        i += n
+    return bytes(out)
+
+def write_binary(fn, width, height, bits, palette, data, key):
+    with open(fn, 'wb') as f:
+        f.write(struct.pack(_HDR, _MAGIC, width, height, bits, len(palette) - 1, key))
+        f.write(bytes(c for rgb in palette for c in rgb))
+        f.write(data)
+
+def _bytes(name, data):
+    lines = ["b'{}'".format(''.join('\\x{:02x}'.format(b) for b in data[i : i + 16]))
+             for i in range(0, len(data), 16)]
+    return '{} =\\\n{}\n'.format(name, '\\\n'.join(lines))
+
+def write_module(fn, src, width, height, bits, palette, data, key):
+    pal = bytes(c for rgb in palette for c in rgb)
+    with open(fn, 'w') as f:
+        f.write('# Code generated by img_to_py.py.\n')
+        f.write('# Image: {}\n'.format(os.path.basename(src)))
+        f.write("version = '0.1'\n\n")
+        for func, val in (('width', width), ('height', height), ('bits', bits), ('key', key)):
+            f.write('def {}():\n    return {}\n\n'.format(func, val))
+        f.write('def palette():\n    return _palette\n\n')
+        f.write('def data():\n    return memoryview(_data)\n\n')
+        f.write(_bytes('_palette', pal))
+        f.write('\n')
+        f.write(_bytes('_data', data))
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert an image for nano-gui.')
+    parser.add_argument('infile', help='Input image (any format supported by Pillow).')
+    parser.add_argument('outfile', help='Output Python module or binary file.')
+    parser.add_argument('-c', '--colors', type=int, default=16,
+                        help='Maximum number of colors (2-256, default 16).')
+    parser.add_argument('-b', '--binary', action='store_true',
+                        help='Write a binary file for gui.core.image.ImageFile.')
+    args = parser.parse_args()
+    if not 2 <= args.colors <= 256:
+        print('Number of colors must be in range 2-256.')
+        sys.exit(1)
+    width, height, palette, pixels, key = load(args.infile, args.colors)
+    bits = 4 if len(palette) <= 16 else 8
+    data = encode(pixels, bits)
+    if args.binary:
+        write_binary(args.outfile, width, height, bits, palette, data, key)
+    else:
+        write_module(args.outfile, args.infile, width, height, bits, palette, data, key)
+    raw = (width * height * 16) // 8
+    print('{} {}x{} {} colors: {} bytes ({}% of RGB565).'.format(args.outfile,
+          width, height, len(palette), len(data), (100 * len(data)) // raw))
+
+if __name__ == '__main__':
+    main()